@@ -15,38 +15,85 @@
 # ║                                                                            ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
-import pygame
+import csv
+import importlib.util
 import math
-import numpy as np
-from collections import deque
+import random
 import sys
+import time
+from array import array
+from collections import Counter, OrderedDict
+
+from joyal_engine import (EdgeList, IncrementalJoyal, TreeIndex, UnionFind, cycle_notation,
+                          decompose, function_to_parents, parse_function)
 
 # ==============================================================================
-# INICIALIZACIÓN
+# IMPORTACIONES DIFERIDAS
 # ==============================================================================
 
-pygame.init()
+def lazy_import(name):
+    """
+    Módulo que se carga en el primer acceso a uno de sus atributos.
+    Importar este archivo (p. ej. para usar find/union) no paga pygame
+    ni NumPy.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+pygame = lazy_import("pygame")
+np = lazy_import("numpy")
+joyal_layout = lazy_import("joyal_layout")
+
+# ==============================================================================
+# INICIALIZACIÓN
+# ==============================================================================
 
 # Configuración de pantalla
 WIDTH, HEIGHT = 1280, 900
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Demostración de Joyal - Fórmula de Cayley")
-
-# Fuentes profesionales
-try:
-    FONT_TITLE = pygame.font.Font(None, 48)
-    FONT_SUBTITLE = pygame.font.Font(None, 32)
-    FONT_BOLD = pygame.font.Font(None, 28)
-    FONT_REGULAR = pygame.font.Font(None, 24)
-    FONT_SMALL = pygame.font.Font(None, 20)
-    FONT_TINY = pygame.font.Font(None, 16)
-except:
-    FONT_TITLE = pygame.font.SysFont('Arial', 48, bold=True)
-    FONT_SUBTITLE = pygame.font.SysFont('Arial', 32, bold=True)
-    FONT_BOLD = pygame.font.SysFont('Arial', 28, bold=True)
-    FONT_REGULAR = pygame.font.SysFont('Arial', 24)
-    FONT_SMALL = pygame.font.SysFont('Arial', 20)
-    FONT_TINY = pygame.font.SysFont('Arial', 16)
+
+# Ventana y fuentes: las crea init_display (al arrancar JoyalApplication)
+screen = None
+FONT_TITLE = FONT_SUBTITLE = FONT_BOLD = FONT_REGULAR = FONT_SMALL = FONT_TINY = None
+
+def init_display(visible=True):
+    """
+    Inicia pygame, abre la ventana (visible=False: superficie fuera de
+    pantalla del mismo tamaño) y carga las fuentes. Idempotente.
+    """
+    global screen, FONT_TITLE, FONT_SUBTITLE, FONT_BOLD, FONT_REGULAR, FONT_SMALL, FONT_TINY
+    if screen is not None:
+        return screen
+    pygame.init()
+    if visible:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Demostración de Joyal - Fórmula de Cayley")
+    else:
+        screen = pygame.Surface((WIDTH, HEIGHT))
+
+    # Fuentes profesionales
+    try:
+        FONT_TITLE = pygame.font.Font(None, 48)
+        FONT_SUBTITLE = pygame.font.Font(None, 32)
+        FONT_BOLD = pygame.font.Font(None, 28)
+        FONT_REGULAR = pygame.font.Font(None, 24)
+        FONT_SMALL = pygame.font.Font(None, 20)
+        FONT_TINY = pygame.font.Font(None, 16)
+    except:
+        FONT_TITLE = pygame.font.SysFont('Arial', 48, bold=True)
+        FONT_SUBTITLE = pygame.font.SysFont('Arial', 32, bold=True)
+        FONT_BOLD = pygame.font.SysFont('Arial', 28, bold=True)
+        FONT_REGULAR = pygame.font.SysFont('Arial', 24)
+        FONT_SMALL = pygame.font.SysFont('Arial', 20)
+        FONT_TINY = pygame.font.SysFont('Arial', 16)
+    return screen
 
 # Paleta de colores profesional
 COLORS = {
@@ -68,13 +115,149 @@ COLORS = {
     'highlight': (241, 196, 15)
 }
 
+# Límites de n: hasta CIRCLE_MAX_N se usa el círculo clásico; por encima,
+# las disposiciones de joyal_layout. Con radio menor que LABEL_MIN_RAD los
+# vértices se dibujan sin número.
+MAX_N = 5000
+CIRCLE_MAX_N = 30
+LABEL_MIN_RAD = 10
+# Radio mínimo de clic/hover, para poder acertar a vértices pequeños
+HIT_MIN_RAD = 8
+# Con la vista alejada (radio en pantalla menor que LOD_MIN_RAD) se dibuja
+# con menos detalle: sin números, aristas finas y colas agrupadas.
+LOD_MIN_RAD = 3
+ZOOM_STEP = 1.2
+
 # Variables globales
 n = 6
 vertice_pos = []
 vertice_rad = 28
-aristas = []
-grafo = []
-parent = []
+aristas = EdgeList()
+uf = UnionFind(0)
+
+# ==============================================================================
+# CACHÉ DE TEXTO
+# ==============================================================================
+
+class TextCache:
+    """
+    Superficies de texto ya renderizadas, indexadas por (fuente, texto, color).
+
+    Se descartan las menos usadas recientemente al superar max_entries o
+    max_bytes de píxeles. Una superficie de más de max_bytes // BIG_FRACTION
+    bytes (texto dinámico muy largo) se devuelve sin guardarla. Las
+    superficies se comparten: quien las recibe sólo debe leerlas o blitearlas.
+    """
+    BIG_FRACTION = 64
+
+    def __init__(self, max_entries=8192, max_bytes=32 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        surf = build()
+        size = surf.get_pitch() * surf.get_height()
+        if size > self.max_bytes // self.BIG_FRACTION:
+            return surf
+        self.entries[key] = (surf, size)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, old) = self.entries.popitem(last=False)
+            self.bytes -= old
+        return surf
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+class DigitAtlas:
+    """
+    Glifos 0-9 renderizados una vez por (fuente, color). Las etiquetas
+    numéricas se componen bliteando glifos, sin rasterizar la fuente.
+    """
+    DIGITS = "0123456789"
+
+    def __init__(self):
+        self.glyphs = {}
+
+    def digits(self, font, color):
+        key = (font, color)
+        glyphs = self.glyphs.get(key)
+        if glyphs is None:
+            glyphs = [font.render(d, True, color) for d in self.DIGITS]
+            self.glyphs[key] = glyphs
+        return glyphs
+
+    def compose(self, font, value, color):
+        glyphs = self.digits(font, color)
+        parts = [glyphs[ord(c) - 48] for c in str(value)]
+        surf = pygame.Surface((sum(g.get_width() for g in parts), font.get_height()),
+                              pygame.SRCALPHA)
+        x = 0
+        for g in parts:
+            surf.blit(g, (x, 0))
+            x += g.get_width()
+        return surf
+
+TEXT_CACHE = TextCache()
+DIGIT_ATLAS = DigitAtlas()
+
+def render_text(font, text, color):
+    """font.render(text, True, color) con caché compartida"""
+    return TEXT_CACHE.get((font, text, color), lambda: font.render(text, True, color))
+
+def render_label(font, value, color):
+    """Etiqueta de un entero no negativo (número de vértice) compuesta con el atlas"""
+    return TEXT_CACHE.get((font, value, color), lambda: DIGIT_ATLAS.compose(font, value, color))
+
+def fit_text(font, text, max_px):
+    """
+    text, o su prefijo más largo seguido de "..." que cabe en max_px
+    (búsqueda binaria; se mide con font.size, sin rasterizar)
+    """
+    if font.size(text)[0] <= max_px:
+        return text
+    # Ningún carácter mide menos de un píxel
+    lo, hi = 0, min(len(text), max_px)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if font.size(text[:mid] + "...")[0] <= max_px:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + "..."
+
+def wrap_tokens(font, tokens, sep, max_px, max_lines):
+    """
+    Agrupa tokens en líneas de menos de max_px. Se detiene al llenar
+    max_lines; devuelve (líneas, si quedaron tokens sin mostrar).
+    """
+    lines, current = [], ""
+    for token in tokens:
+        candidate = current + sep + token if current else token
+        if font.size(candidate)[0] < max_px:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        if len(lines) >= max_lines:
+            return lines, True
+        current = token
+    if current:
+        if len(lines) >= max_lines:
+            return lines, True
+        lines.append(current)
+    return lines, False
 
 # ==============================================================================
 # COMPONENTES DE UI PROFESIONALES
@@ -91,6 +274,8 @@ class ProfessionalButton:
         self.is_clicked = False
         self.shadow_offset = 3
         self.border_radius = 8
+        self.dirty = True
+        self._overlay = None
         
     def draw(self, surface):
         # Sombra
@@ -105,20 +290,27 @@ class ProfessionalButton:
         pygame.draw.rect(surface, border_color, self.rect, 2, border_radius=self.border_radius)
         
         # Texto
-        text_surf = FONT_BOLD.render(self.text, True, COLORS['white'])
+        text_surf = render_text(FONT_BOLD, self.text, COLORS['white'])
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
         
         # Efecto de hover
         if self.is_hovered:
-            overlay = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-            overlay.fill((255, 255, 255, 30))
-            surface.blit(overlay, self.rect)
+            if self._overlay is None or self._overlay.get_size() != self.rect.size:
+                self._overlay = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+                self._overlay.fill((255, 255, 255, 30))
+            surface.blit(self._overlay, self.rect)
     
     def update(self, mouse_pos):
-        self.is_hovered = self.rect.collidepoint(mouse_pos)
+        hovered = self.rect.collidepoint(mouse_pos)
+        if hovered != self.is_hovered:
+            self.dirty = True
+        self.is_hovered = hovered
         self.current_color = self.hover_color if self.is_hovered else self.color
         return self.is_hovered
+
+    def dirty_rect(self):
+        return self.rect.union(self.rect.move(self.shadow_offset, self.shadow_offset))
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -136,11 +328,12 @@ class InputField:
         self.active = False
         self.cursor_visible = True
         self.cursor_timer = 0
+        self.dirty = True
         
     def draw(self, surface):
         # Dibujar etiqueta primero (si existe)
         if self.label:
-            label_surf = FONT_SMALL.render(self.label, True, COLORS['dark'])
+            label_surf = render_text(FONT_SMALL, self.label, COLORS['dark'])
             surface.blit(label_surf, (self.rect.x, self.rect.y - 25))
         
         # Sombra
@@ -158,16 +351,9 @@ class InputField:
         # Texto o placeholder
         display_text = self.text if self.text else self.placeholder
         text_color = COLORS['dark'] if self.text else COLORS['gray']
-        text_surf = FONT_REGULAR.render(display_text, True, text_color)
-        
         # Recortar si es necesario
-        max_width = self.rect.width - 20
-        if text_surf.get_width() > max_width:
-            # Crear texto recortado
-            temp_text = display_text
-            while FONT_REGULAR.render(temp_text + "...", True, text_color).get_width() > max_width and len(temp_text) > 1:
-                temp_text = temp_text[:-1]
-            text_surf = FONT_REGULAR.render(temp_text + "...", True, text_color)
+        display_text = fit_text(FONT_REGULAR, display_text, self.rect.width - 20)
+        text_surf = render_text(FONT_REGULAR, display_text, text_color)
         
         text_x = self.rect.x + 10
         text_y = self.rect.y + (self.rect.height - text_surf.get_height()) // 2
@@ -185,12 +371,23 @@ class InputField:
         if self.cursor_timer >= 500:  # Parpadeo cada 500ms
             self.cursor_visible = not self.cursor_visible
             self.cursor_timer = 0
+            # el cursor sólo se ve con el campo activo
+            self.dirty = self.dirty or self.active
+
+    def dirty_rect(self):
+        return self.rect.union(self.rect.move(2, 2))
+
+    def next_timer(self):
+        """Milisegundos hasta el próximo parpadeo visible (None si inactivo)"""
+        return max(0, 500 - self.cursor_timer) if self.active else None
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             self.active = self.rect.collidepoint(event.pos)
+            self.dirty = True
             
         if event.type == pygame.KEYDOWN and self.active:
+            self.dirty = True
             if event.key == pygame.K_RETURN:
                 return True
             elif event.key == pygame.K_BACKSPACE:
@@ -205,11 +402,116 @@ class InputField:
     def get_value(self):
         return self.text.strip()
 
+class StaticLayer:
+    """
+    Capa pre-renderizada con la parte estática de una pantalla (fondo,
+    paneles, encabezados). Sólo se vuelve a dibujar cuando cambia su clave
+    o se invalida explícitamente. Con alpha=True la capa es transparente
+    y de tamaño size, para superponerla (p. ej. las aristas de un grafo).
+    """
+    def __init__(self, build, size=None, alpha=False):
+        self.build = build
+        self.size = size or (WIDTH, HEIGHT)
+        self.alpha = alpha
+        self.key = None
+        self.surface = None
+
+    def get(self, key=None):
+        if self.surface is None or key != self.key:
+            if self.alpha:
+                self.surface = pygame.Surface(self.size, pygame.SRCALPHA)
+            else:
+                self.surface = pygame.Surface(self.size)
+            self.build(self.surface)
+            self.key = key
+        return self.surface
+
+    def invalidate(self):
+        self.surface = None
+
+class DirtyScreen:
+    """
+    Base de las pantallas: lleva la cuenta de las zonas a presentar.
+
+    Cualquier cambio de estado invalida la pantalla completa; el hover de
+    los botones y el parpadeo del cursor sólo marcan su propio rectángulo.
+    """
+    _full_redraw = True
+    _pending = ()
+
+    def widgets(self):
+        return []
+
+    def invalidate(self):
+        self._full_redraw = True
+
+    def mark_dirty(self, rect):
+        """Marca una zona concreta (p. ej. el vértice bajo el ratón)"""
+        if not self._pending:
+            self._pending = []
+        self._pending.append(pygame.Rect(rect))
+
+    def collect_dirty(self):
+        rects = list(self._pending)
+        self._pending = ()
+        for w in self.widgets():
+            if w.dirty:
+                rects.append(w.dirty_rect())
+                w.dirty = False
+        if self._full_redraw:
+            self._full_redraw = False
+            return [pygame.Rect(0, 0, WIDTH, HEIGHT)]
+        return rects
+
+    def next_timer(self):
+        """Milisegundos hasta el próximo cambio sin entrada del usuario (None: ninguno)"""
+        timers = [t for t in (getattr(w, "next_timer", lambda: None)() for w in self.widgets())
+                  if t is not None]
+        return min(timers) if timers else None
+
+def draw_arrows(surface, geometry, color, width=3):
+    """Dibuja las flechas calculadas por joyal_layout.arrow_geometry"""
+    A, B, heads = geometry
+    line, polygon = pygame.draw.line, pygame.draw.polygon
+    for a, b, tri in zip(A.tolist(), B.tolist(), heads.tolist()):
+        line(surface, color, a, b, width)
+        polygon(surface, color, tri)
+
+def draw_segments(surface, segments, color, width):
+    """Dibuja los segmentos (A, B, _) de joyal_layout.trimmed_segments"""
+    A, B, _ = segments
+    line = pygame.draw.line
+    for a, b in zip(A.tolist(), B.tolist()):
+        line(surface, color, a, b, width)
+
+def handle_camera_event(camera, event, area, drag_buttons=(2, 3)):
+    """
+    Rueda: zoom en el cursor; arrastre con drag_buttons: desplazamiento;
+    Inicio: vista original. Devuelve True si la vista cambió.
+    """
+    if event.type == pygame.MOUSEWHEEL:
+        mx, my = pygame.mouse.get_pos()
+        if area.collidepoint(mx, my) and event.y:
+            camera.zoom_at(mx, my, ZOOM_STEP ** event.y)
+            return True
+    elif event.type == pygame.MOUSEBUTTONDOWN and event.button in drag_buttons:
+        if area.collidepoint(event.pos):
+            camera.drag_from = event.pos
+    elif event.type == pygame.MOUSEBUTTONUP and event.button in drag_buttons:
+        camera.drag_from = None
+    elif event.type == pygame.MOUSEMOTION and camera.drag_from is not None:
+        camera.pan(*event.rel)
+        return True
+    elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+        camera.reset()
+        return True
+    return False
+
 # ==============================================================================
 # PANTALLA DE SELECCIÓN DE N
 # ==============================================================================
 
-class NSelectionScreen:
+class NSelectionScreen(DirtyScreen):
     def __init__(self):
         self.title = "DEMOSTRACIÓN MEDIANTE EL MÉTODO DE JOYAL"
         self.subtitle = "Fórmula de Cayley: n^(n-2) árboles etiquetados"
@@ -217,21 +519,26 @@ class NSelectionScreen:
         # Campo de entrada
         input_width = 300
         input_x = WIDTH // 2 - input_width // 2
-        self.n_input = InputField(input_x, 350, input_width, 50, 
+        self.n_input = InputField(input_x, 400, input_width, 50, 
                                  "NÚMERO DE VÉRTICES (n ≥ 2)", "Ej: 6")
         
         # Botón de confirmación
         btn_width = 200
         btn_x = WIDTH // 2 - btn_width // 2
-        self.confirm_btn = ProfessionalButton(btn_x, 450, btn_width, 50, "CONTINUAR", COLORS['success'])
+        self.confirm_btn = ProfessionalButton(btn_x, 455, btn_width, 50, "CONTINUAR", COLORS['success'])
         
         # Botón de información
         self.info_btn = ProfessionalButton(WIDTH - 120, 30, 100, 40, "ℹ️ INFO", COLORS['info'])
         
         self.error_message = ""
         self.selected_n = 6
-        
-    def draw(self, surface):
+
+        self.static_layer = StaticLayer(self.draw_static)
+
+    def widgets(self):
+        return [self.n_input, self.confirm_btn, self.info_btn]
+
+    def draw_static(self, surface):
         # Fondo general
         surface.fill(COLORS['background'])
 
@@ -240,11 +547,11 @@ class NSelectionScreen:
         pygame.draw.rect(surface, COLORS['header'], header_rect)
 
         # Título
-        title_surf = FONT_TITLE.render(self.title, True, COLORS['white'])
+        title_surf = render_text(FONT_TITLE, self.title, COLORS['white'])
         surface.blit(title_surf, (WIDTH//2 - title_surf.get_width()//2, 30))
 
         # Subtítulo
-        subtitle_surf = FONT_SUBTITLE.render(self.subtitle, True, COLORS['light'])
+        subtitle_surf = render_text(FONT_SUBTITLE, self.subtitle, COLORS['light'])
         surface.blit(subtitle_surf, (WIDTH//2 - subtitle_surf.get_width()//2, 80))
 
         # Panel central (más grande y con más aire)
@@ -262,7 +569,7 @@ class NSelectionScreen:
         pygame.draw.rect(surface, COLORS['info'], header_rect, border_radius=20)
 
         # Texto dentro del nuevo encabezado
-        header_text = FONT_REGULAR.render("CONFIGURACIÓN INICIAL", True, COLORS['white'])
+        header_text = render_text(FONT_REGULAR, "CONFIGURACIÓN INICIAL", COLORS['white'])
         surface.blit(header_text, (WIDTH//2 - header_text.get_width()//2,
                                 header_y + header_h//2 - header_text.get_height()//2))
 
@@ -274,29 +581,31 @@ class NSelectionScreen:
 
         base_y = 310
         for i, line in enumerate(instructions):
-            text = FONT_REGULAR.render(line, True, COLORS['dark'])
+            text = render_text(FONT_REGULAR, line, COLORS['dark'])
             surface.blit(text, (WIDTH//2 - text.get_width()//2, base_y + i * 28))
 
-        # Input (posición correcta)
-        self.n_input.rect.y = 400
+    def draw(self, surface):
+        surface.blit(self.static_layer.get(), (0, 0))
+
+        # Input
         self.n_input.draw(surface)
 
         # Botón continuar
-        self.confirm_btn.rect.y = 455
         self.confirm_btn.draw(surface)
 
         # Error
         if self.error_message:
-            err = FONT_SMALL.render(self.error_message, True, COLORS['danger'])
+            err = render_text(FONT_SMALL, self.error_message, COLORS['danger'])
             surface.blit(err, (WIDTH//2 - err.get_width()//2, 520))
 
         # Resultado fórmula (bien separado)
         try:
             temp_n = int(self.n_input.get_value() or "6")
             if 2 <= temp_n <= 20:
-                result = FONT_BOLD.render(
+                result = render_text(
+                    FONT_BOLD,
                     f"n = {temp_n}: {temp_n}^({temp_n}-2) = {temp_n**(temp_n-2):,} árboles",
-                    True, COLORS['success']
+                    COLORS['success']
                 )
                 surface.blit(result, (WIDTH//2 - result.get_width()//2, 560))
                 self.selected_n = temp_n
@@ -330,8 +639,8 @@ class NSelectionScreen:
             if n_val < 2:
                 self.error_message = "El número debe ser al menos 2"
                 return False
-            elif n_val > 30:
-                self.error_message = "Para mejor rendimiento, use n ≤ 30"
+            elif n_val > MAX_N:
+                self.error_message = f"Para mejor rendimiento, use n ≤ {MAX_N}"
                 return False
             else:
                 self.error_message = ""
@@ -348,7 +657,7 @@ class NSelectionScreen:
 # PANTALLA PRINCIPAL (REEMPLAZAR ESTA CLASE) 
 # ==============================================================================
 
-class MainMenuScreen:
+class MainMenuScreen(DirtyScreen):
     def __init__(self):
         self.title = f"DEMOSTRACIÓN DE JOYAL - n = {n}"
 
@@ -368,7 +677,13 @@ class MainMenuScreen:
 
         self.btn_back = ProfessionalButton(30, 30, 120, 40, "← VOLVER", COLORS['gray'])
 
-    def draw(self, surface):
+        # Encabezado, panel, texto y vista previa no cambian mientras n sea el mismo
+        self.static_layer = StaticLayer(self.draw_static)
+
+    def widgets(self):
+        return [self.btn_mode1, self.btn_mode2, self.btn_reset, self.btn_back]
+
+    def draw_static(self, surface):
         surface.fill(COLORS['background'])
 
         # Encabezado con gradiente
@@ -378,13 +693,13 @@ class MainMenuScreen:
             pygame.draw.line(surface, (color_val, 60, 114), (0, y), (WIDTH, y))
 
         # Título centrado
-        title_surf = FONT_TITLE.render(self.title, True, COLORS['white'])
+        title_surf = render_text(FONT_TITLE, self.title, COLORS['white'])
         surface.blit(title_surf, (WIDTH//2 - title_surf.get_width()//2, 30))
 
         # Subtítulo (fórmula)
-        formula = FONT_SUBTITLE.render(
-            f"Fórmula de Cayley: n^(n-2) = {n}^({n}-2) = {n**(n-2):,}",
-            True,
+        formula = render_text(
+            FONT_SUBTITLE,
+            f"Fórmula de Cayley: n^(n-2) = {n}^({n}-2) = {formato_cayley(n)}",
             COLORS['light']
         )
         surface.blit(formula, (WIDTH//2 - formula.get_width()//2, 90))
@@ -407,22 +722,25 @@ class MainMenuScreen:
         panel_center = self.left_x + self.left_width // 2
 
         for i, line in enumerate(desc_lines):
-            line_surf = FONT_REGULAR.render(line, True, COLORS['dark'])
+            line_surf = render_text(FONT_REGULAR, line, COLORS['dark'])
             surface.blit(
                 line_surf,
                 (panel_center - line_surf.get_width() // 2,
                 base_y + i * 28)
             )
-   
+
+        # PREVIEW DEL ÁRBOL — AHORA A LA DERECHA
+        self.draw_vertices_preview(surface)
+
+    def draw(self, surface):
+        surface.blit(self.static_layer.get(n), (0, 0))
+
         # Botones
         self.btn_mode1.draw(surface)
         self.btn_mode2.draw(surface)
         self.btn_reset.draw(surface)
         self.btn_back.draw(surface)
 
-        # PREVIEW DEL ÁRBOL — AHORA A LA DERECHA
-        self.draw_vertices_preview(surface)
-
     def draw_vertices_preview(self, surface):
         # Círculo centrado a la derecha
         center_x = WIDTH - 350
@@ -449,12 +767,13 @@ class MainMenuScreen:
             pygame.draw.circle(surface, COLORS['vertex'], (int(x), int(y)), vertice_rad)
             pygame.draw.circle(surface, COLORS['white'], (int(x), int(y)), vertice_rad, 2)
 
-            num_surf = FONT_BOLD.render(str(i+1), True, COLORS['white'])
-            surface.blit(num_surf, (int(x)-num_surf.get_width()//2,
-                                    int(y)-num_surf.get_height()//2))
+            if vertice_rad >= LABEL_MIN_RAD:
+                num_surf = render_label(FONT_BOLD, i+1, COLORS['white'])
+                surface.blit(num_surf, (int(x)-num_surf.get_width()//2,
+                                        int(y)-num_surf.get_height()//2))
 
         # Texto informativo
-        info = FONT_SMALL.render(f"Mostrando {num_vertices} vértices", True, COLORS['gray'])
+        info = render_text(FONT_SMALL, f"Mostrando {num_vertices} vértices", COLORS['gray'])
         surface.blit(info, (center_x - info.get_width()//2, center_y + radius + 30))
 
     def update(self, mouse_pos, dt):
@@ -474,7 +793,10 @@ class MainMenuScreen:
 # MODO 1 — ÁRBOL → FUNCIÓN (Versión final mejorada para panel e interfaz)
 # ============================================================================
 
-class TreeToFunctionMode:
+class TreeToFunctionMode(DirtyScreen):
+    # Líneas de aristas dirigidas en el panel cuando también se lista f
+    EDGE_LINES_WITH_FUNCTION = 8
+
     def __init__(self):
         self.title = "MODO 1: ÁRBOL → FUNCIÓN"
 
@@ -483,10 +805,13 @@ class TreeToFunctionMode:
         self.start_vertex = None
         self.end_vertex = None
 
-        self.function = [None] * n
-        self.spine_edges = []
-        self.directed_edges = []
+        self.function = array('i', [-1]) * n
+        self.spine_edges = EdgeList()
+        self.directed_edges = EdgeList()
         self.spine_path = None
+        self.on_spine = set()
+        self.tree_index = None
+        self.hover_vertex = None
 
         # Botones superiores
         self.btn_back = ProfessionalButton(30, 25, 130, 45, "← MENÚ", COLORS["gray"])
@@ -507,10 +832,20 @@ class TreeToFunctionMode:
         # Área del árbol
         self.graph_area = pygame.Rect(430, 120, WIDTH - 470, HEIGHT - 260)
 
-        # Posicionamiento mejorado
+        # Posicionamiento mejorado (y su índice para clic y hover)
         self.vertex_pos = []
+        self.vertex_index = None
+        self.camera = joyal_layout.Camera(self.graph_area)
         self.compute_vertex_positions()
 
+        # Encabezado, marcos e indicador de pasos: se rehacen sólo al cambiar de paso
+        self.static_layer = StaticLayer(self.draw_static)
+        # Aristas y flechas: se rehacen sólo al cambiar el árbol o la orientación
+        self.edge_layer = StaticLayer(self.draw_edge_layer, self.graph_area.size, alpha=True)
+
+    def widgets(self):
+        return [self.btn_back, self.btn_reset, self.btn_prev, self.btn_next]
+
     # -------------------------------------------------------------------------
     def compute_vertex_positions(self):
         """ Genera los vértices en un círculo dentro del área del grafo. """
@@ -520,6 +855,8 @@ class TreeToFunctionMode:
         # Radio dinámico — SIEMPRE centrado y sin salirse
         base = min(self.graph_area.width, self.graph_area.height) * 0.38
         radius = int(max(80, base - n * 6))   # seguro y proporcional a n
+        if n > CIRCLE_MAX_N:
+            radius = int(base)
 
         self.vertex_pos = []
         for i in range(n):
@@ -528,27 +865,64 @@ class TreeToFunctionMode:
             y = cy + radius * math.sin(angle)
             self.vertex_pos.append((int(x), int(y)))
 
+        self.world_pos = np.array(self.vertex_pos, dtype=float).reshape(-1, 2)
+        self.vertex_index = joyal_layout.SpatialGrid(self.vertex_pos, 2 * max(vertice_rad, HIT_MIN_RAD))
+        self.camera.reset()
+
+    def node_radius(self):
+        """Radio de los vértices en pantalla con el zoom actual"""
+        return max(1, int(round(vertice_rad * self.camera.zoom)))
+
+    def screen_pos(self, i):
+        x, y = self.camera.to_screen(self.world_pos[i])
+        return int(round(x)), int(round(y))
+
+    def vertex_at(self, pos):
+        """Vértice bajo pos, consultando la rejilla (O(1) esperado)"""
+        if not self.graph_area.collidepoint(pos):
+            return None
+        zoom = self.camera.zoom
+        x, y = self.camera.to_world(*pos)
+        return self.vertex_index.nearest(x, y, max(vertice_rad, HIT_MIN_RAD / zoom))
+
+    def vertex_rect(self, i):
+        """Zona de pantalla de un vértice con su sombra y su anillo"""
+        x, y = self.screen_pos(i)
+        r = self.node_radius() + 8
+        return pygame.Rect(x - r, y - r, 2 * r + 2, 2 * r + 2)
+
     # -------------------------------------------------------------------------
-    def draw(self, surface):
+    def draw_static(self, surface):
         surface.fill(COLORS["background"])
 
         # Encabezado
         pygame.draw.rect(surface, COLORS["info"], (0, 0, WIDTH, 80))
-        title_surf = FONT_TITLE.render(self.title, True, COLORS["white"])
+        title_surf = render_text(FONT_TITLE, self.title, COLORS["white"])
         surface.blit(title_surf, (WIDTH//2 - title_surf.get_width()//2, 22))
 
         # Instrucciones
-        instr = FONT_REGULAR.render(self.get_instructions(), True, COLORS["dark"])
+        instr = render_text(FONT_REGULAR, self.get_instructions(), COLORS["dark"])
         surface.blit(instr, (WIDTH//2 - instr.get_width()//2, 85))
 
         # Panel izquierdo (info)
         pygame.draw.rect(surface, COLORS["white"], self.info_panel, border_radius=12)
         pygame.draw.rect(surface, COLORS["accent"], self.info_panel, 2, border_radius=12)
-        self.draw_info_panel(surface)
 
         # Área del árbol (derecha)
         pygame.draw.rect(surface, COLORS["white"], self.graph_area, border_radius=12)
         pygame.draw.rect(surface, COLORS["accent"], self.graph_area, 2, border_radius=12)
+
+        # Indicador de pasos (queda bajo los vértices, que nunca llegan a esa altura)
+        self.draw_step_indicator(surface)
+
+    def draw(self, surface):
+        surface.blit(self.static_layer.get(self.step), (0, 0))
+
+        # Con n grande el texto no debe invadir el área del árbol
+        previous_clip = surface.get_clip()
+        surface.set_clip(previous_clip.clip(self.info_panel))
+        self.draw_info_panel(surface)
+        surface.set_clip(previous_clip)
         self.draw_tree(surface)
 
         # Botones superiores
@@ -561,9 +935,6 @@ class TreeToFunctionMode:
         if self.step < 3 and self.check_step_complete():
             self.btn_next.draw(surface)
 
-        # Indicador de pasos (ajustado para dejar espacio a botones)
-        self.draw_step_indicator(surface)
-
     # -------------------------------------------------------------------------
     def get_instructions(self):
         texts = [
@@ -575,22 +946,47 @@ class TreeToFunctionMode:
         return texts[self.step]
 
     # -------------------------------------------------------------------------
+    def edge_layer_key(self):
+        # Las posiciones sólo cambian con la cámara: basta el contenido de las aristas
+        return (self.camera.version, aristas.u.tobytes(), aristas.v.tobytes(),
+                self.spine_path and tuple(self.spine_path),
+                self.directed_edges.u.tobytes(), self.directed_edges.v.tobytes())
+
+    def draw_edge_layer(self, layer):
+        P = self.world_pos
+        S = self.camera.to_screen(P) - self.graph_area.topleft
+        r = self.node_radius()
+        lod = r < LOD_MIN_RAD
+
+        # Aristas (base) visibles; en un árbol, una arista con ambos extremos
+        # en la vértebra es de la vértebra
+        u = np.asarray(aristas.u, dtype=np.int64)
+        v = np.asarray(aristas.v, dtype=np.int64)
+        seen = self.camera.visible_segments(P, u, v)
+        u, v = u[seen], v[seen]
+        mask = np.zeros(n, dtype=bool)
+        mask[list(self.on_spine)] = True
+        spine = mask[u] & mask[v]
+        for keep, color, width in ((~spine, COLORS["edge"], 3), (spine, COLORS["spine"], 5)):
+            draw_segments(layer, joyal_layout.trimmed_segments(S, u[keep], v[keep], 0), color, 1 if lod else width)
+
+        # Aristas orientadas (flechas); de lejos, sin punta
+        d = self.directed_edges
+        du = np.asarray(d.u, dtype=np.int64)
+        dv = np.asarray(d.v, dtype=np.int64)
+        seen = self.camera.visible_segments(P, du, dv)
+        if lod:
+            draw_segments(layer, joyal_layout.trimmed_segments(S, du[seen], dv[seen], r), COLORS["arrow"], 1)
+        else:
+            head = 12 * min(1.0, self.camera.zoom)
+            draw_arrows(layer, joyal_layout.arrow_geometry(S, du[seen], dv[seen], r, head=head, spread=0.5),
+                        COLORS["arrow"])
+
     def draw_tree(self, surface):
-        # Aristas (base)
-        for v1, v2 in aristas:
-            x1, y1 = self.vertex_pos[v1]
-            x2, y2 = self.vertex_pos[v2]
-
-            color = COLORS["edge"]
-            width = 3
-            if (v1, v2) in self.spine_edges or (v2, v1) in self.spine_edges:
-                color = COLORS["spine"]
-                width = 5
-            pygame.draw.line(surface, color, (x1, y1), (x2, y2), width)
-
-        # Aristas orientadas (flechas)
-        for v1, v2 in self.directed_edges:
-            self.draw_arrow(surface, self.vertex_pos[v1], self.vertex_pos[v2], COLORS["arrow"])
+        # Todo lo del grafo queda dentro de su área, aunque la vista se desplace
+        previous_clip = surface.get_clip()
+        surface.set_clip(previous_clip.clip(self.graph_area))
+        surface.blit(self.edge_layer.get(self.edge_layer_key()), self.graph_area.topleft)
 
         # Vértices
         self.draw_vertices(surface)
@@ -600,12 +996,20 @@ class TreeToFunctionMode:
             self.highlight_vertex(surface, self.start_vertex, COLORS["success"])
         if self.end_vertex is not None:
             self.highlight_vertex(surface, self.end_vertex, COLORS["danger"])
+        if self.hover_vertex is not None:
+            self.highlight_vertex(surface, self.hover_vertex, COLORS["highlight"])
+        surface.set_clip(previous_clip)
 
     # -------------------------------------------------------------------------
     def draw_vertices(self, surface):
-        for i, pos in enumerate(self.vertex_pos):
+        r = self.node_radius()
+        lod = r < LOD_MIN_RAD
+        shown = np.flatnonzero(self.camera.visible(self.world_pos, r + 2))
+        S = np.rint(self.camera.to_screen(self.world_pos[shown])).astype(int)
+        for i, pos in zip(shown.tolist(), S.tolist()):
             # Sombra
-            pygame.draw.circle(surface, (80, 80, 80), (pos[0] + 2, pos[1] + 2), vertice_rad)
+            if not lod:
+                pygame.draw.circle(surface, (80, 80, 80), (pos[0] + 2, pos[1] + 2), r)
 
             color = COLORS["vertex"]
             if i == self.selected_vertex:
@@ -615,41 +1019,27 @@ class TreeToFunctionMode:
             if i == self.end_vertex:
                 color = COLORS["danger"]
 
-            pygame.draw.circle(surface, color, pos, vertice_rad)
-            pygame.draw.circle(surface, COLORS["white"], pos, vertice_rad, 2)
+            pygame.draw.circle(surface, color, pos, r)
+            if lod:
+                continue
+            pygame.draw.circle(surface, COLORS["white"], pos, r, 2)
 
-            label = FONT_BOLD.render(str(i+1), True, COLORS["white"])
-            surface.blit(label, (pos[0] - label.get_width()//2, pos[1] - label.get_height()//2))
+            if r >= LABEL_MIN_RAD:
+                label = render_label(FONT_BOLD, i+1, COLORS["white"])
+                surface.blit(label, (pos[0] - label.get_width()//2, pos[1] - label.get_height()//2))
 
     # -------------------------------------------------------------------------
-    def draw_arrow(self, surface, start, end, color):
-        dx = end[0] - start[0]
-        dy = end[1] - start[1]
-        L = math.hypot(dx, dy)
-        if L == 0:
-            return
-
-        start_adj = (start[0] + dx / L * vertice_rad, start[1] + dy / L * vertice_rad)
-        end_adj = (end[0] - dx / L * vertice_rad, end[1] - dy / L * vertice_rad)
-
-        pygame.draw.line(surface, color, start_adj, end_adj, 3)
-        angle = math.atan2(dy, dx)
-        s = 12
-        p1 = (end_adj[0] - s*math.cos(angle - 0.5), end_adj[1] - s*math.sin(angle - 0.5))
-        p2 = (end_adj[0] - s*math.cos(angle + 0.5), end_adj[1] - s*math.sin(angle + 0.5))
-        pygame.draw.polygon(surface, color, [end_adj, p1, p2])
-
     def highlight_vertex(self, surface, i, color):
-        pos = self.vertex_pos[i]
-        pygame.draw.circle(surface, color, pos, vertice_rad + 5, 3)
+        pygame.draw.circle(surface, color, self.screen_pos(i), self.node_radius() + 5, 3)
 
     # -------------------------------------------------------------------------
     def draw_info_panel(self, surface):
         x = self.info_panel.x + 20
         y = self.info_panel.y + 20
+        bottom = self.info_panel.bottom - 12
 
         # Título
-        surface.blit(FONT_BOLD.render("INFORMACIÓN DEL ÁRBOL", True, COLORS["accent"]), (x, y))
+        surface.blit(render_text(FONT_BOLD, "INFORMACIÓN DEL ÁRBOL", COLORS["accent"]), (x, y))
         y += 40
 
         # Datos principales
@@ -665,7 +1055,7 @@ class TreeToFunctionMode:
             info_lines.append(f"Fin: {self.end_vertex+1}")
 
         for txt in info_lines:
-            surface.blit(FONT_SMALL.render(txt, True, COLORS["dark"]), (x, y))
+            surface.blit(render_text(FONT_SMALL, txt, COLORS["dark"]), (x, y))
             y += 20
 
         # Separador
@@ -675,68 +1065,64 @@ class TreeToFunctionMode:
 
         # VÉRTEBRA (mostrar solo números, ordenada)
         if self.spine_path:
-            surface.blit(FONT_BOLD.render("VÉRTEBRA:", True, COLORS["spine"]), (x, y))
+            surface.blit(render_text(FONT_BOLD, "VÉRTEBRA:", COLORS["spine"]), (x, y))
             y += 26
 
             # Mostrar sin prefijo 'V' y con separación clara:
-            spine_txt = "  •  ".join(str(v+1) for v in self.spine_path)
-            # Si muy larga, romper en varias líneas
             max_px = self.info_panel.width - 40
-            rendered = FONT_TINY.render(spine_txt, True, COLORS["dark"])
-            if rendered.get_width() <= max_px:
-                surface.blit(FONT_TINY.render(spine_txt, True, COLORS["dark"]), (x, y))
+            one_line, cut = wrap_tokens(FONT_TINY, (str(v+1) for v in self.spine_path), "  •  ", max_px + 1, 1)
+            if not cut:
+                surface.blit(render_text(FONT_TINY, one_line[0], COLORS["dark"]), (x, y))
                 y += 26
             else:
-                # partir en bloques de tamaño razonable
-                parts = []
-                current = ""
-                for token in (str(v+1) for v in self.spine_path):
-                    if FONT_TINY.size(current + "  " + token)[0] < max_px:
-                        current = (current + "  " + token).strip()
-                    else:
-                        parts.append(current)
-                        current = token
-                if current:
-                    parts.append(current)
+                # partir en bloques de tamaño razonable, sólo los que caben
+                parts, cut = wrap_tokens(FONT_TINY, (str(v+1) for v in self.spine_path), "  ",
+                                         max_px, max(1, (bottom - y) // 20 - 1))
+                if cut:
+                    parts.append("...")
                 for p in parts:
-                    surface.blit(FONT_TINY.render(p, True, COLORS["dark"]), (x, y))
+                    surface.blit(render_text(FONT_TINY, p, COLORS["dark"]), (x, y))
                     y += 20
                 y += 6
 
         # ARISTAS ORIENTADAS (formato u → v), con envoltura si hay muchas
         if self.directed_edges:
-            surface.blit(FONT_BOLD.render("ARISTAS ORIENTADAS:", True, COLORS["info"]), (x, y))
+            surface.blit(render_text(FONT_BOLD, "ARISTAS ORIENTADAS:", COLORS["info"]), (x, y))
             y += 26
 
-            # Preparamos líneas agrupadas por columnas para que entren ordenadamente
+            # Preparamos líneas agrupadas por columnas para que entren
+            # ordenadamente; con la función a la vista se reservan a lo sumo
+            # EDGE_LINES_WITH_FUNCTION líneas
             max_px = self.info_panel.width - 40
-            col_texts = []
-            cur_line = ""
-            for (u, v) in self.directed_edges:
-                pair = f"{u+1} → {v+1}"
-                if FONT_TINY.size(cur_line + "   " + pair)[0] < max_px:
-                    cur_line = (cur_line + "   " + pair).strip()
-                else:
-                    col_texts.append(cur_line)
-                    cur_line = pair
-            if cur_line:
-                col_texts.append(cur_line)
+            max_lines = max(1, (bottom - y) // 18 - 1)
+            if self.step == 3:
+                max_lines = min(max_lines, self.EDGE_LINES_WITH_FUNCTION)
+            pairs = (f"{u+1} → {v+1}" for u, v in self.directed_edges)
+            col_texts, cut = wrap_tokens(FONT_TINY, pairs, "   ", max_px, max_lines)
+            if cut:
+                col_texts.append("...")
 
             # Renderizamos las líneas resultantes
             for line in col_texts:
-                surface.blit(FONT_TINY.render(line, True, COLORS["dark"]), (x, y))
+                surface.blit(render_text(FONT_TINY, line, COLORS["dark"]), (x, y))
                 y += 18
             y += 6
 
         # FUNCIÓN (cuando paso 3 = completado)
         if self.step == 3:
-            surface.blit(FONT_BOLD.render("FUNCIÓN:", True, COLORS["success"]), (x, y))
+            surface.blit(render_text(FONT_BOLD, "FUNCIÓN:", COLORS["success"]), (x, y))
             y += 26
-            for i in range(n):
+            # Sólo las líneas que caben; el resto se resume con "..."
+            rows = min(n, (bottom - y) // 16)
+            if rows < n:
+                rows = max(0, rows - 1)
+            for i in range(rows):
                 fv = self.function[i]
-                txt = f"f({i+1}) = {fv+1 if fv is not None else '?'}"
-                surface.blit(FONT_TINY.render(txt, True, COLORS["dark"]), (x, y))
+                txt = f"f({i+1}) = {fv+1 if fv >= 0 else '?'}"
+                surface.blit(render_text(FONT_TINY, txt, COLORS["dark"]), (x, y))
                 y += 16
+            if rows < n:
+                surface.blit(render_text(FONT_TINY, "...", COLORS["dark"]), (x, y))
 
     # -------------------------------------------------------------------------
     def draw_step_indicator(self, surface):
@@ -756,7 +1142,7 @@ class TreeToFunctionMode:
             pygame.draw.rect(surface, color, box, border_radius=10)
             pygame.draw.rect(surface, COLORS["white"], box, 2, border_radius=10)
 
-            txt = FONT_SMALL.render(steps[i], True, COLORS["white"])
+            txt = render_text(FONT_SMALL, steps[i], COLORS["white"])
             surface.blit(txt, (box.centerx - txt.get_width()//2,
                                box.centery - txt.get_height()//2))
 
@@ -764,8 +1150,7 @@ class TreeToFunctionMode:
     # LÓGICA
     # -------------------------------------------------------------------------
     def is_connected(self):
-        root = find(0)
-        return all(find(i) == root for i in range(n))
+        return uf.components == 1
 
     def check_step_complete(self):
         if self.step == 0:
@@ -799,81 +1184,43 @@ class TreeToFunctionMode:
                 self.step = 3
 
     def add_edge(self, v1, v2):
-        if (v1, v2) in aristas or (v2, v1) in aristas:
-            return
+        # Una arista repetida también une vértices ya conectados
         if find(v1) == find(v2):
             return
 
         aristas.append((v1, v2))
         union(v1, v2)
-        grafo[v1].append(v2)
-        grafo[v2].append(v1)
 
     # -------------------------------------------------------------------------
     def calculate_function(self):
-        self.spine_path = self.find_path(self.start_vertex, self.end_vertex)
+        # El árbol ya no cambia tras el paso 0: se indexa una sola vez y
+        # elegir otro inicio o final sólo recorre los caminos afectados
+        if self.tree_index is None:
+            self.tree_index = TreeIndex(n, aristas, root=self.end_vertex)
+        index = self.tree_index
+        index.set_end(self.end_vertex)
 
-        # Generar vértebra y aristas de vértebra
-        if len(self.spine_path) > 1:
-            self.spine_edges = [(self.spine_path[i], self.spine_path[i+1])
-                                for i in range(len(self.spine_path)-1)]
+        # Vértebra y orientación hacia el vértice final (motor de Joyal)
+        self.spine_path = index.path(self.start_vertex, self.end_vertex)
+        self.on_spine = set(self.spine_path)
 
-            # Emparejamiento de la biyección (Joyal)
-            sorted_spine = sorted(self.spine_path)
-            reversed_spine = list(reversed(self.spine_path))
-            for i in range(len(sorted_spine)):
-                self.function[sorted_spine[i]] = reversed_spine[i]
+        # Generar aristas de vértebra
+        self.spine_edges = EdgeList.from_path(self.spine_path)
 
         # Aristas orientadas fuera de la vértebra
-        self.directed_edges = self.direct_edges()
-
-        # Completar función con aristas orientadas
-        for v1, v2 in self.directed_edges:
-            self.function[v1] = v2
-
-    def find_path(self, start, end):
-        visited = [False] * n
-        parent = [-1] * n
-        q = deque([start])
-        visited[start] = True
-
-        while q:
-            v = q.popleft()
-            if v == end:
-                path = []
-                while v != -1:
-                    path.append(v)
-                    v = parent[v]
-                return list(reversed(path))
-
-            for u in grafo[v]:
-                if not visited[u]:
-                    visited[u] = True
-                    parent[u] = v
-                    q.append(u)
-        return [start, end]
-
-    def direct_edges(self):
-        dist = [-1] * n
-        q = deque([self.end_vertex])
-        dist[self.end_vertex] = 0
-
-        while q:
-            v = q.popleft()
-            for u in grafo[v]:
-                if dist[u] == -1:
-                    dist[u] = dist[v] + 1
-                    q.append(u)
-
-        out = []
-        for v1, v2 in aristas:
-            if (v1, v2) in self.spine_edges or (v2, v1) in self.spine_edges:
-                continue
-            if dist[v1] > dist[v2]:
-                out.append((v1, v2))
-            else:
-                out.append((v2, v1))
-
+        self.directed_edges = self.direct_edges(index.towards)
+
+        # Emparejamiento de la biyección (Joyal) + aristas orientadas
+        self.function = index.function(self.start_vertex)
+
+    def direct_edges(self, towards_end):
+        # Cada vértice fuera de la vértebra aporta su arista hacia el final
+        off = np.ones(n, dtype=bool)
+        off[self.spine_path] = False
+        src = np.flatnonzero(off)
+        out = EdgeList()
+        out.u = array('i', src.tolist())
+        out.v = array('i', np.asarray(towards_end)[src].tolist())
         return out
 
     # -------------------------------------------------------------------------
@@ -894,36 +1241,57 @@ class TreeToFunctionMode:
         if self.btn_next.handle_event(event) and self.check_step_complete() and self.step < 3:
             self.step += 1
 
+        # Vista: rueda y arrastre con el botón derecho o central
+        if handle_camera_event(self.camera, event, self.graph_area):
+            self.invalidate()
+
+        # Hover: sólo se redibujan los dos vértices afectados
+        if event.type == pygame.MOUSEMOTION:
+            hovered = self.vertex_at(event.pos)
+            if hovered != self.hover_vertex:
+                for v in (self.hover_vertex, hovered):
+                    if v is not None:
+                        self.mark_dirty(self.vertex_rect(v))
+                self.hover_vertex = hovered
+
         # Click en vértices
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mx, my = event.pos
-            for i, pos in enumerate(self.vertex_pos):
-                if (mx - pos[0])**2 + (my - pos[1])**2 <= vertice_rad**2:
-                    self.handle_vertex_click(i)
-                    break
+            i = self.vertex_at(event.pos)
+            if i is not None:
+                self.handle_vertex_click(i)
         return None
 
     def reset(self):
-        global aristas, grafo, parent
+        global uf
         aristas.clear()
-        grafo = [[] for _ in range(n)]
-        parent = list(range(n))
+        uf = UnionFind(n)
 
         self.step = 0
         self.selected_vertex = None
         self.start_vertex = None
         self.end_vertex = None
-        self.function = [None] * n
+        self.function = array('i', [-1]) * n
         self.spine_edges.clear()
         self.directed_edges.clear()
         self.spine_path = None
+        self.on_spine = set()
+        self.tree_index = None
 
         self.compute_vertex_positions()
 
 # =======================================================================
 # MODO 2: FUNCIÓN → ÁRBOL (versión corregida: vértebra como camino dibujable)
 # =======================================================================
-class FunctionToTreeMode:
+class FunctionToTreeMode(DirtyScreen):
+    # Con hasta MAX_POINT_UPDATES valores distintos de la función anterior
+    # se actualiza el motor incremental en lugar de reconstruirlo
+    MAX_POINT_UPDATES = 64
+
+    # Papel de cada vértice (banderas en self.roles)
+    ROLE_BRANCH = 0
+    ROLE_CYCLIC = 1
+    ROLE_SPINE = 2
+
     def __init__(self):
         self.title = "MODO 2: FUNCIÓN → ÁRBOL"
 
@@ -944,6 +1312,7 @@ class FunctionToTreeMode:
         self.btn_send     = ProfessionalButton(input_x,           btn_y, 140, 44, "ENVIAR",    COLORS['info'])
         self.btn_generate = ProfessionalButton(input_x + 158,     btn_y, 160, 44, "CONSTRUIR", COLORS['success'])
         self.btn_clear    = ProfessionalButton(input_x + 340,     btn_y, 140, 44, "LIMPIAR",   COLORS['warning'])
+        self.btn_random   = ProfessionalButton(input_x + 498,     btn_y, 170, 44, "ALEATORIA", COLORS['accent'])
         self.btn_back     = ProfessionalButton(20, 20, 120, 40, "← MENÚ", COLORS['gray'])
 
         # Panels
@@ -952,21 +1321,63 @@ class FunctionToTreeMode:
                                       WIDTH - (self.info_rect.right + 36), HEIGHT - 320)
 
         # Estado
-        self.function = []                 
+        self.function = array('i')
+        self.joyal = None
+        self.tree_diff = None
         self._cycles_list = []             
-        self.vertices_in_cycles = []       
-        self.vertices_not_in_cycles = []
-        self.tree_edges = []               
-        self.spine_edges = []              
+        self.vertices_in_cycles = array('i')
+        self.vertices_not_in_cycles = array('i')
+        self.spine_path = []
+        self.tree_edges = EdgeList()
+        self.spine_edges = EdgeList()
         self.vertex_pos = []
+        self.roles = bytearray(n)
+        self._layout_key = None
+        self._layout_version = 0
+        self.world_pos = np.zeros((0, 2))
+        self.tail_root = np.zeros(0, dtype=np.int64)
+        self._clusters = None
+        self.camera = joyal_layout.Camera(self.graph_rect)
         self.error_message = ""
         self.stage = "idle"                
         self._debug = False
 
+        # Encabezado, tarjeta y marcos de los paneles
+        self.static_layer = StaticLayer(self.draw_static)
+        # Flechas y aristas del grafo: se rehacen sólo al cambiar la disposición
+        self.edge_layer = StaticLayer(self.draw_edge_layer, self.graph_rect.size, alpha=True)
+
+    def widgets(self):
+        return [self.func_input, self.btn_back, self.btn_send, self.btn_generate, self.btn_clear,
+                self.btn_random]
+
     # -----------------------------
     # posiciones centradas en graph_rect
     # -----------------------------
     def compute_positions(self):
+        # Se calcula una vez por (n, rectángulo, etapa); process_function y
+        # construct_tree_from_function la invalidan al cambiar el grafo.
+        key = (n, tuple(self.graph_rect), self.stage)
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        self._layout_version += 1
+
+        if n > CIRCLE_MAX_N and self.function:
+            if self.stage == "tree":
+                P = joyal_layout.tree_layout(function_to_parents(self.function), self.spine_path, self.graph_rect)
+            else:
+                P = joyal_layout.force_layout(self.function, self.graph_rect)
+            self.vertex_pos = joyal_layout.to_points(P)
+        else:
+            self.compute_circle_positions()
+
+        # Nueva disposición: vista original y grupos de colas por recalcular
+        self.world_pos = np.array(self.vertex_pos, dtype=float).reshape(-1, 2)
+        self._clusters = None
+        self.camera.reset()
+
+    def compute_circle_positions(self):
         area = self.graph_rect
         cx = area.x + area.w // 2
         cy = area.y + area.h // 2
@@ -998,20 +1409,33 @@ class FunctionToTreeMode:
     # -----------------------------
     # draw / UI
     # -----------------------------
-    def draw(self, surface):
+    def draw_static(self, surface):
         surface.fill(COLORS['background'])
 
         # header
         header = pygame.Rect(0, 0, WIDTH, 64)
         pygame.draw.rect(surface, COLORS['header'], header)
-        htext = FONT_TITLE.render(self.title, True, COLORS['white'])
+        htext = render_text(FONT_TITLE, self.title, COLORS['white'])
         surface.blit(htext, (WIDTH//2 - htext.get_width()//2, 10))
 
         # card
         pygame.draw.rect(surface, COLORS['white'], self.card_rect, border_radius=12)
         pygame.draw.rect(surface, COLORS['light'], self.card_rect, 2, border_radius=12)
-        lbl = FONT_REGULAR.render("f(V):", True, COLORS['dark'])
+        lbl = render_text(FONT_REGULAR, "f(V):", COLORS['dark'])
         surface.blit(lbl, (self.card_rect.x + 18, self.card_rect.y + 16))
+
+        # left info panel
+        pygame.draw.rect(surface, COLORS['white'], self.info_rect, border_radius=12)
+        pygame.draw.rect(surface, COLORS['light'], self.info_rect, 2, border_radius=12)
+        title = render_text(FONT_BOLD, "INFORMACIÓN", COLORS['dark'])
+        surface.blit(title, (self.info_rect.x + 16, self.info_rect.y + 12))
+
+        # right graph panel
+        pygame.draw.rect(surface, COLORS['white'], self.graph_rect, border_radius=12)
+        pygame.draw.rect(surface, COLORS['light'], self.graph_rect, 2, border_radius=12)
+
+    def draw(self, surface):
+        surface.blit(self.static_layer.get(), (0, 0))
         self.func_input.draw(surface)
 
         # botones
@@ -1019,33 +1443,29 @@ class FunctionToTreeMode:
         self.btn_send.draw(surface)
         self.btn_generate.draw(surface)
         self.btn_clear.draw(surface)
+        self.btn_random.draw(surface)
 
         if self.error_message:
-            err = FONT_SMALL.render(self.error_message, True, COLORS['danger'])
+            err = render_text(FONT_SMALL, self.error_message, COLORS['danger'])
             surface.blit(err, (self.card_rect.x + 18, self.card_rect.y + self.card_rect.height - 30))
 
         # left info panel
-        pygame.draw.rect(surface, COLORS['white'], self.info_rect, border_radius=12)
-        pygame.draw.rect(surface, COLORS['light'], self.info_rect, 2, border_radius=12)
-        title = FONT_BOLD.render("INFORMACIÓN", True, COLORS['dark'])
-        surface.blit(title, (self.info_rect.x + 16, self.info_rect.y + 12))
         if self.function:
+            previous_clip = surface.get_clip()
+            surface.set_clip(previous_clip.clip(self.info_rect))
             self.draw_info(surface)
+            surface.set_clip(previous_clip)
         else:
-            hint = FONT_SMALL.render("Pulse ENVIAR para visualizar f(V).", True, COLORS['gray'])
+            hint = render_text(FONT_SMALL, "Pulse ENVIAR para visualizar f(V).", COLORS['gray'])
             surface.blit(hint, (self.info_rect.x + 16, self.info_rect.y + 48))
 
-        # right graph panel
-        pygame.draw.rect(surface, COLORS['white'], self.graph_rect, border_radius=12)
-        pygame.draw.rect(surface, COLORS['light'], self.graph_rect, 2, border_radius=12)
-
         # draw stage
         if self.stage == "function":
             self.draw_function(surface)
         elif self.stage == "tree":
             self.draw_tree(surface)
         else:
-            hint2 = FONT_SMALL.render("Aquí se dibujará la función o el árbol.", True, COLORS['gray'])
+            hint2 = render_text(FONT_SMALL, "Aquí se dibujará la función o el árbol.", COLORS['gray'])
             surface.blit(hint2, (self.graph_rect.centerx - hint2.get_width()//2,
                                  self.graph_rect.centery - hint2.get_height()//2))
 
@@ -1055,209 +1475,246 @@ class FunctionToTreeMode:
     def draw_info(self, surface):
         x = self.info_rect.x + 16
         y = self.info_rect.y + 44
+        # Las cadenas de longitud proporcional a n se recortan al panel
+        max_px = self.info_rect.width - 32
 
         ftext = "f(V) = [" + ", ".join(str(v+1) for v in self.function) + "]"
-        surface.blit(FONT_SMALL.render(ftext, True, COLORS['dark']), (x, y))
+        surface.blit(render_text(FONT_SMALL, fit_text(FONT_SMALL, ftext, max_px), COLORS['dark']), (x, y))
         y += 28
 
         # vértebra (string)
-        if self.vertices_in_cycles:
-            spine_txt = "Vértebra: " + " - ".join(str(v+1) for v in self.vertices_in_cycles)
-            surface.blit(FONT_SMALL.render(spine_txt, True, COLORS['spine']), (x, y))
+        if self.spine_path:
+            spine_txt = "Vértebra: " + " - ".join(str(v+1) for v in self.spine_path)
+            surface.blit(render_text(FONT_SMALL, fit_text(FONT_SMALL, spine_txt, max_px), COLORS['spine']), (x, y))
         else:
-            surface.blit(FONT_SMALL.render("Vértebra: —", True, COLORS['gray']), (x, y))
+            surface.blit(render_text(FONT_SMALL, "Vértebra: —", COLORS['gray']), (x, y))
         y += 26
 
         # otros vértices
         if self.vertices_not_in_cycles:
             others_txt = "Otros vértices: " + ", ".join(str(v+1) for v in self.vertices_not_in_cycles)
-            surface.blit(FONT_SMALL.render(others_txt, True, COLORS['dark']), (x, y))
+            surface.blit(render_text(FONT_SMALL, fit_text(FONT_SMALL, others_txt, max_px), COLORS['dark']), (x, y))
         else:
-            surface.blit(FONT_SMALL.render("Otros vértices: —", True, COLORS['gray']), (x, y))
+            surface.blit(render_text(FONT_SMALL, "Otros vértices: —", COLORS['gray']), (x, y))
         y += 26
 
         # permutación
-        perm = self.get_permutation()
-        surface.blit(FONT_SMALL.render("Permutación: " + perm, True, COLORS['dark']), (x, y))
+        perm_txt = fit_text(FONT_SMALL, "Permutación: " + self.get_permutation(), max_px)
+        surface.blit(render_text(FONT_SMALL, perm_txt, COLORS['dark']), (x, y))
         y += 28
 
+        # aristas del árbol que cambió la última edición
+        if self.tree_diff is not None:
+            added, removed = self.tree_diff
+            diff_txt = f"Último cambio: +{len(added)} / −{len(removed)} aristas"
+            surface.blit(render_text(FONT_SMALL, diff_txt, COLORS['accent']), (x, y))
+            y += 26
+
         # tabla f(V)
-        surface.blit(FONT_BOLD.render("Tabla f(V):", True, COLORS['dark']), (x, y))
+        surface.blit(render_text(FONT_BOLD, "Tabla f(V):", COLORS['dark']), (x, y))
         y += 24
         col_v = x
         col_f = x + 60
-        surface.blit(FONT_TINY.render("V", True, COLORS['dark']), (col_v, y))
-        surface.blit(FONT_TINY.render("f(V)", True, COLORS['dark']), (col_f, y))
+        surface.blit(render_text(FONT_TINY, "V", COLORS['dark']), (col_v, y))
+        surface.blit(render_text(FONT_TINY, "f(V)", COLORS['dark']), (col_f, y))
         y += 18
         pygame.draw.line(surface, COLORS['light'], (col_v, y-6), (self.info_rect.right - 14, y-6), 1)
 
         max_rows = min(12, n)
         for i in range(max_rows):
             fv = self.function[i]
-            surface.blit(FONT_TINY.render(str(i+1), True, COLORS['dark']), (col_v, y))
-            surface.blit(FONT_TINY.render(str(fv+1) if fv is not None else "?", True, COLORS['dark']), (col_f, y))
+            surface.blit(render_label(FONT_TINY, i+1, COLORS['dark']), (col_v, y))
+            surface.blit(render_text(FONT_TINY, str(fv+1) if fv is not None else "?", COLORS['dark']), (col_f, y))
             y += 18
         if n > max_rows:
-            surface.blit(FONT_TINY.render("...", True, COLORS['dark']), (col_v, y))
+            surface.blit(render_text(FONT_TINY, "...", COLORS['dark']), (col_v, y))
 
     # -----------------------------
     # draws function arrows
     # -----------------------------
     def draw_function(self, surface):
-        self.compute_positions()
-        for i, f in enumerate(self.function):
-            if f is None or f < 0 or f >= n:
-                continue
-            p1 = self.vertex_pos[i]
-            p2 = self.vertex_pos[f]
-            if i == f:
-                self.draw_loop(surface, p1)
-            else:
-                self.draw_arrow(surface, p1, p2, COLORS['arrow'])
-
-        for i, pos in enumerate(self.vertex_pos):
-            pygame.draw.circle(surface, COLORS['vertex'], pos, vertice_rad)
-            pygame.draw.circle(surface, COLORS['white'], pos, vertice_rad, 2)
-            t = FONT_BOLD.render(str(i+1), True, COLORS['white'])
-            surface.blit(t, (pos[0]-t.get_width()//2, pos[1]-t.get_height()//2))
+        self.draw_graph(surface, lambda i: COLORS['vertex'])
 
     # -----------------------------
     # draw final tree: spine (path) + branches
     # -----------------------------
     def draw_tree(self, surface):
-        self.compute_positions()
-
-        # helper: avoid drawing into node center
-        def border(a, b):
-            (x1, y1) = self.vertex_pos[a]
-            (x2, y2) = self.vertex_pos[b]
-            dx, dy = x2-x1, y2-y1
-            L = math.hypot(dx, dy)
-            if L == 0:
-                return (x1, y1), (x2, y2)
-            s = vertice_rad
-            return (
-                (x1 + dx/L*s, y1 + dy/L*s),
-                (x2 - dx/L*s, y2 - dy/L*s)
-            )
-
-        # normal edges
-        for a, b in self.tree_edges:
-            A, B = border(a, b)
-            pygame.draw.line(surface, COLORS['edge'], A, B, 3)
-
-        # spine edges (path) — draw thicker and visible
-        for a, b in self.spine_edges:
-            A, B = border(a, b)
-            pygame.draw.line(surface, COLORS['spine'], A, B, 8)
-
-        # arrows for non-cycle vertices pointing to f(v)
-        for v in self.vertices_not_in_cycles:
-            fv = self.function[v]
-            if fv is None: 
-                continue
-            self.draw_arrow(surface, self.vertex_pos[v], self.vertex_pos[fv], COLORS['arrow'])
+        roles = self.roles
+        self.draw_graph(surface, lambda i: COLORS['spine'] if roles[i] & self.ROLE_SPINE else COLORS['vertex'])
 
+    def draw_graph(self, surface, color_of):
+        self.compute_positions()
+        # Todo lo del grafo queda dentro de su área, aunque la vista se desplace
+        previous_clip = surface.get_clip()
+        surface.set_clip(previous_clip.clip(self.graph_rect))
+        surface.blit(self.edge_layer.get((self._layout_version, self.camera.version)),
+                     self.graph_rect.topleft)
         # nodes on top
-        for i, pos in enumerate(self.vertex_pos):
-            col = COLORS['spine'] if i in self.vertices_in_cycles else COLORS['vertex']
-            pygame.draw.circle(surface, col, pos, vertice_rad)
-            pygame.draw.circle(surface, COLORS['white'], pos, vertice_rad, 2)
-            t = FONT_BOLD.render(str(i+1), True, COLORS['white'])
-            surface.blit(t, (pos[0]-t.get_width()//2, pos[1]-t.get_height()//2))
+        self.draw_nodes(surface, color_of)
+        surface.set_clip(previous_clip)
+
+    def node_radius(self):
+        """Radio de los vértices en pantalla con el zoom actual"""
+        return max(1, int(round(vertice_rad * self.camera.zoom)))
+
+    def draw_nodes(self, surface, color_of):
+        r = self.node_radius()
+        lod = r < LOD_MIN_RAD
+        shown = np.flatnonzero(self.camera.visible(self.world_pos, r + 2))
+        if lod:
+            # las colas se dibujan agrupadas en la capa de aristas
+            shown = shown[np.frombuffer(self.roles, dtype=np.uint8)[shown] != self.ROLE_BRANCH]
+        S = np.rint(self.camera.to_screen(self.world_pos[shown])).astype(int)
+        for i, pos in zip(shown.tolist(), S.tolist()):
+            pygame.draw.circle(surface, color_of(i), pos, r)
+            if lod:
+                continue
+            pygame.draw.circle(surface, COLORS['white'], pos, r, 2)
+            if r >= LABEL_MIN_RAD:
+                t = render_label(FONT_BOLD, i+1, COLORS['white'])
+                surface.blit(t, (pos[0]-t.get_width()//2, pos[1]-t.get_height()//2))
 
     # -----------------------------
-    # arrow drawing (respect node radius)
+    # edge layer: geometry for all visible edges in one NumPy pass (respect node radius)
     # -----------------------------
-    def draw_arrow(self, surface, p1, p2, color):
-        dx = p2[0] - p1[0]
-        dy = p2[1] - p1[1]
-        L = math.hypot(dx, dy)
-        if L < 1e-6:
-            return
-        s = vertice_rad
-        start = (p1[0] + dx / L * s, p1[1] + dy / L * s)
-        end   = (p2[0] - dx / L * s, p2[1] - dy / L * s)
-        pygame.draw.line(surface, color, start, end, 3)
-        ang = math.atan2(dy, dx)
-        arrow_size = 10
-        left  = (end[0] - arrow_size * math.cos(ang - math.pi/6), end[1] - arrow_size * math.sin(ang - math.pi/6))
-        right = (end[0] - arrow_size * math.cos(ang + math.pi/6), end[1] - arrow_size * math.sin(ang + math.pi/6))
-        pygame.draw.polygon(surface, color, [end, left, right])
-
-    def draw_loop(self, surface, pos):
+    def draw_edge_layer(self, layer):
+        P = self.world_pos
+        S = self.camera.to_screen(P) - self.graph_rect.topleft
+        F = np.frombuffer(self.function, dtype=np.int32).astype(np.int64) if self.function else np.zeros(0, np.int64)
+        r = self.node_radius()
+        lod = r < LOD_MIN_RAD
+        head = 10 * min(1.0, self.camera.zoom)
+        cyclic = np.frombuffer(self.roles, dtype=np.uint8) != self.ROLE_BRANCH
+        seen = lambda src, dst: self.camera.visible_segments(P, src, dst, r)
+
+        if self.stage == "function":
+            moving = F != np.arange(len(F))
+            if lod:
+                moving &= cyclic
+            src = np.flatnonzero(moving)
+            src = src[seen(src, F[src])]
+            if lod:
+                draw_segments(layer, joyal_layout.trimmed_segments(S, src, F[src], r), COLORS['arrow'], 1)
+            else:
+                draw_arrows(layer, joyal_layout.arrow_geometry(S, src, F[src], r, head=head), COLORS['arrow'])
+                fixed = np.flatnonzero((F == np.arange(len(F))) & self.camera.visible(P, 40))
+                for pos in S[fixed].tolist():
+                    self.draw_loop(layer, pos, r)
+
+        elif self.stage == "tree":
+            tree = self.tree_edges
+            spine = self.spine_edges
+            u, v = np.asarray(tree.u, dtype=np.int64), np.asarray(tree.v, dtype=np.int64)
+            keep = seen(u, v)
+            if lod:
+                keep &= cyclic[u] & cyclic[v]
+            # normal edges
+            draw_segments(layer, joyal_layout.trimmed_segments(S, u[keep], v[keep], r), COLORS['edge'], 1 if lod else 3)
+            # spine edges (path) — draw thicker and visible
+            u, v = np.asarray(spine.u, dtype=np.int64), np.asarray(spine.v, dtype=np.int64)
+            keep = seen(u, v)
+            draw_segments(layer, joyal_layout.trimmed_segments(S, u[keep], v[keep], r), COLORS['spine'], 2 if lod else 8)
+            # arrows for non-cycle vertices pointing to f(v)
+            if not lod:
+                branch = np.frombuffer(self.vertices_not_in_cycles, dtype=np.int32).astype(np.int64)
+                branch = branch[seen(branch, F[branch])]
+                draw_arrows(layer, joyal_layout.arrow_geometry(S, branch, F[branch], r, head=head), COLORS['arrow'])
+
+        if lod and self.function:
+            self.draw_clusters(layer, S, r)
+
+    def tail_clusters(self):
+        """
+        Colas agrupadas por el punto cíclico del que cuelgan: (raíces,
+        centroides en mundo, tamaños). Se recalcula con cada disposición.
+        """
+        if self._clusters is None:
+            branch = np.flatnonzero(np.frombuffer(self.roles, dtype=np.uint8) == self.ROLE_BRANCH)
+            roots = self.tail_root[branch]
+            count = np.bincount(roots, minlength=n)
+            P = self.world_pos[branch]
+            centroid = np.column_stack((np.bincount(roots, P[:, 0], minlength=n),
+                                        np.bincount(roots, P[:, 1], minlength=n)))
+            has = np.flatnonzero(count)
+            self._clusters = (has, centroid[has] / count[has, None], count[has])
+        return self._clusters
+
+    def draw_clusters(self, layer, S, r):
+        roots, centroids, counts = self.tail_clusters()
+        C = self.camera.to_screen(centroids) - self.graph_rect.topleft
+        radii = np.minimum(40, r * np.sqrt(counts) + 1)
+        w, h = self.graph_rect.size
+        lo = np.minimum(S[roots], C) - radii[:, None]
+        hi = np.maximum(S[roots], C) + radii[:, None]
+        seen = (hi[:, 0] >= 0) & (lo[:, 0] <= w) & (hi[:, 1] >= 0) & (lo[:, 1] <= h)
+        fill = COLORS['vertex'] + (90,)
+        for a, c, rad in zip(S[roots][seen].tolist(), C[seen].tolist(), radii[seen].tolist()):
+            pygame.draw.line(layer, COLORS['edge'], a, c, 1)
+            pygame.draw.circle(layer, fill, c, rad)
+
+    def draw_loop(self, surface, pos, r=None):
+        r = vertice_rad if r is None else r
         rx, ry = 18, 12
-        rect = pygame.Rect(pos[0] - rx, pos[1] - ry - vertice_rad - 4, rx*2, ry*2)
+        rect = pygame.Rect(pos[0] - rx, pos[1] - ry - r - 4, rx*2, ry*2)
         pygame.draw.arc(surface, COLORS['arrow'], rect, math.radians(10), math.radians(350), 3)
 
     # -----------------------------
     # process input text
     # -----------------------------
     def process_function(self):
-        txt = self.func_input.get_value().strip()
-        if not txt:
-            self.error_message = "Ingrese la función."
-            return False
         try:
-            vals = [int(x.strip()) for x in txt.split(",") if x.strip() != ""]
-        except:
-            self.error_message = "Formato inválido: use números separados por comas."
-            return False
-        if len(vals) != n:
-            self.error_message = f"Debe ingresar exactamente {n} valores."
-            return False
-        if any(v < 1 or v > n for v in vals):
-            self.error_message = f"Valores deben estar entre 1 y {n}."
+            f = parse_function(self.func_input.get_value(), n)
+        except ValueError as e:
+            self.error_message = str(e)
             return False
-
-        self.function = [v-1 for v in vals]
         self.error_message = ""
+        self.tree_diff = self._apply_function(f)
+        self.function = array('i', self.joyal.f)
         self._detect_cycles_ordered()
-        self.tree_edges = []
-        self.spine_edges = []
+        self.spine_path = self.joyal.spine()
+        self.tree_edges = EdgeList()
+        self.spine_edges = EdgeList()
+        self._layout_key = None
         self.stage = "function"
         if self._debug:
             print("process_function OK. cycles:", [[x+1 for x in c] for c in self._cycles_list])
         return True
 
+    def _apply_function(self, f):
+        """
+        Lleva self.joyal a f. Si difiere en pocos valores de la función
+        anterior se aplican como f[i] = j y se devuelven las aristas del
+        árbol (añadidas, quitadas); si no, se reconstruye y devuelve None.
+        """
+        if self.joyal is not None and len(self.joyal.f) == len(f):
+            changed = np.flatnonzero(np.asarray(self.joyal.f) != np.asarray(f))
+            if len(changed) <= self.MAX_POINT_UPDATES:
+                net = Counter()
+                for i in changed.tolist():
+                    added, removed = self.joyal.set(i, f[i])
+                    net.update(added)
+                    net.subtract(removed)
+                return list((+net).elements()), list((-net).elements())
+        self.joyal = IncrementalJoyal(f)
+        return None
+
     # -----------------------------
     # detect cycles (preserve order)
     # -----------------------------
     def _detect_cycles_ordered(self):
-        visited = [False]*n
-        cycles = []
-        non_cycles_accum = []
-
-        for i in range(n):
-            if visited[i]:
-                continue
-            cur = i
-            stack = []
-            idx_map = {}
-            while not visited[cur]:
-                visited[cur] = True
-                idx_map[cur] = len(stack)
-                stack.append(cur)
-                cur = self.function[cur]
-            if cur in idx_map:
-                start = idx_map[cur]
-                cycle = stack[start:]
-                cycles.append(cycle)
-                # prefix are non-cycle nodes
-                prefix = stack[:start]
-                if prefix:
-                    non_cycles_accum.extend(prefix)
-            else:
-                non_cycles_accum.extend(stack)
+        dec = decompose(self.function)
+        cycles = dec.cycles
 
         self._cycles_list = cycles
-        ordered_vertices = []
-        for cyc in cycles:
-            for v in cyc:
-                if v not in ordered_vertices:
-                    ordered_vertices.append(v)
-        self.vertices_in_cycles = ordered_vertices
-        self.vertices_not_in_cycles = [i for i in range(n) if i not in set(self.vertices_in_cycles)]
+        # cada vértice cíclico pertenece a un único ciclo: no hace falta deduplicar
+        self.vertices_in_cycles = array('i', (v for cyc in cycles for v in cyc))
+        self.vertices_not_in_cycles = array('i', (i for i in range(n) if dec.depth[i] > 0))
+        self.tail_root = np.asarray(dec.root, dtype=np.int64)
+
+        # Los puntos cíclicos son también los vértices de la vértebra
+        self.roles = bytearray(n)
+        for v in self.vertices_in_cycles:
+            self.roles[v] = self.ROLE_CYCLIC | self.ROLE_SPINE
 
         if self._debug:
             print("_detect_cycles_ordered:", [[x+1 for x in c] for c in cycles])
@@ -1273,43 +1730,13 @@ class FunctionToTreeMode:
         if not hasattr(self, "_cycles_list"):
             self._detect_cycles_ordered()
 
-        self.tree_edges = []
-        self.spine_edges = []
-
-        # --- 1) Construir la "vértebra" como un CAMINO que une los vértice de cycles
-        # usamos el orden detectado (vertices_in_cycles) y lo invertimos para
-        # que la visualización quede "fin -> ... -> inicio" como en tus ejemplos.
-        spine_order = list(self.vertices_in_cycles)[::-1]  # invertido
-        if len(spine_order) >= 2:
-            for i in range(len(spine_order) - 1):
-                a = spine_order[i]
-                b = spine_order[i+1]
-                if (a, b) not in self.spine_edges and (b, a) not in self.spine_edges:
-                    self.spine_edges.append((a, b))
-                if (a, b) not in self.tree_edges and (b, a) not in self.tree_edges:
-                    self.tree_edges.append((a, b))
-
-        # --- 2) Si había ciclos de longitud >1 y quieres además mostrar sus aristas cerradas,
-        #     descomenta el bloque siguiente (actualmente lo dejamos comentado porque en tus
-        #     ejemplos quieres un camino, no el ciclo cerrado).
-        #
-        # for cyc in self._cycles_list:
-        #     if len(cyc) > 1:
-        #         # si quieres cerrar el ciclo (hacer arista final) descomenta:
-        #         for i in range(len(cyc)):
-        #             a = cyc[i]
-        #             b = cyc[(i+1) % len(cyc)]
-        #             if (a,b) not in self.tree_edges and (b,a) not in self.tree_edges:
-        #                 self.tree_edges.append((a,b))
-        #             if (a,b) not in self.spine_edges and (b,a) not in self.spine_edges:
-        #                 self.spine_edges.append((a,b))
-
-        # --- 3) ramas: para cada vértice que no esté en la vértebra, conectar v -> f(v)
-        for v in self.vertices_not_in_cycles:
-            fv = self.function[v]
-            if 0 <= fv < n:
-                if (v, fv) not in self.tree_edges and (fv, v) not in self.tree_edges:
-                    self.tree_edges.append((v, fv))
+        # --- La vértebra es el camino f(c_k), ..., f(c_0) sobre los puntos
+        # cíclicos ordenados; las ramas unen cada vértice no cíclico con f(v).
+        # El motor devuelve primero las aristas de la vértebra.
+        edges, _, _ = self.joyal.tree()
+        self.tree_edges = edges
+        self.spine_edges = edges[:len(self.vertices_in_cycles) - 1]
+        self._layout_key = None
 
         self.stage = "tree"
         self.error_message = ""
@@ -1323,19 +1750,7 @@ class FunctionToTreeMode:
         if hasattr(self, "_cycles_list") and self._cycles_list:
             return " ".join("(" + " ".join(str(x+1) for x in cyc) + ")" for cyc in self._cycles_list)
         # fallback
-        visited = [False]*n
-        cycles = []
-        for i in range(n):
-            if visited[i]:
-                continue
-            cur = i
-            cyc = []
-            while not visited[cur]:
-                visited[cur] = True
-                cyc.append(cur+1)
-                cur = self.function[cur]
-            cycles.append(cyc)
-        return " ".join("(" + " ".join(map(str, c)) + ")" for c in cycles)
+        return cycle_notation(self.function)
 
     # -----------------------------
     # update / eventos
@@ -1345,6 +1760,7 @@ class FunctionToTreeMode:
         self.btn_send.update(mouse_pos)
         self.btn_generate.update(mouse_pos)
         self.btn_clear.update(mouse_pos)
+        self.btn_random.update(mouse_pos)
         self.func_input.update(dt)
 
     def handle_event(self, event):
@@ -1366,6 +1782,14 @@ class FunctionToTreeMode:
         if self.btn_clear.handle_event(event):
             self.clear()
             return None
+        if self.btn_random.handle_event(event):
+            self.func_input.text = ",".join(str(random.randint(1, n)) for _ in range(n))
+            self.process_function()
+            return None
+        # Vista: rueda y arrastre con cualquier botón dentro del área del grafo
+        if self.stage != "idle" and handle_camera_event(self.camera, event, self.graph_rect, (1, 2, 3)):
+            self.invalidate()
+            return None
         if self.func_input.handle_event(event):
             ok = self.process_function()
             if ok:
@@ -1374,13 +1798,17 @@ class FunctionToTreeMode:
 
     # -----------------------------
     def clear(self):
-        self.function = []
+        self.function = array('i')
+        self.joyal = None
+        self.tree_diff = None
         self._cycles_list = []
-        self.vertices_in_cycles = []
-        self.vertices_not_in_cycles = []
-        self.tree_edges = []
-        self.spine_edges = []
-        self.vertex_pos = []
+        self.vertices_in_cycles = array('i')
+        self.vertices_not_in_cycles = array('i')
+        self.spine_path = []
+        self.tree_edges = EdgeList()
+        self.spine_edges = EdgeList()
+        self.roles = bytearray(n)
+        self._layout_key = None
         self.error_message = ""
         self.stage = "idle"
         self.func_input.text = ""
@@ -1405,43 +1833,157 @@ def calcular_posiciones_vertices(n_vertices):
     
     return vertice_pos
 
+def formato_cayley(n_vertices):
+    """n^(n-2) exacto para n pequeño; en notación científica si no cabe en pantalla"""
+    if n_vertices <= CIRCLE_MAX_N:
+        return f"{n_vertices ** (n_vertices - 2):,}"
+    exp = (n_vertices - 2) * math.log10(n_vertices)
+    return f"≈ {10 ** (exp % 1):.2f} × 10^{int(exp)}"
+
 def inicializar_estructuras(n_vertices):
     """Inicializa las estructuras de datos para n vértices"""
-    global n, grafo, parent, aristas, vertice_rad
+    global n, uf, aristas, vertice_rad
     n = n_vertices
-    aristas = []
-    grafo = [[] for _ in range(n)]
-    parent = list(range(n))
+    aristas = EdgeList()
+    uf = UnionFind(n)
     
     # Ajustar tamaño de vértices según n
     vertice_rad = max(18, min(25, 180 // n))
+    if n > CIRCLE_MAX_N:
+        vertice_rad = max(3, int(18 * (CIRCLE_MAX_N / n) ** 0.5))
     
     calcular_posiciones_vertices(n)
 
 def find(x):
-    """Union-Find: encontrar raíz con compresión de caminos"""
-    if parent[x] != x:
-        parent[x] = find(parent[x])
-    return parent[x]
+    """Union-Find: encontrar raíz con compresión de caminos (iterativo)"""
+    return uf.find(x)
 
 def union(a, b):
-    """Union-Find: unir dos conjuntos"""
-    rootA = find(a)
-    rootB = find(b)
-    if rootA != rootB:
-        parent[rootB] = rootA
-        return True
-    return False
+    """Union-Find: unir dos conjuntos (por rango)"""
+    return uf.union(a, b)
+
+# ==============================================================================
+# PERFILADOR DE FOTOGRAMAS
+# ==============================================================================
+
+class FrameProfiler:
+    """
+    Tiempos por fotograma (eventos, update y draw, en ms) de cada pantalla
+    en un búfer circular de tamaño fijo: al llenarse se sobrescriben los
+    más antiguos. F2 muestra los percentiles p50/p95/p99 de la pantalla
+    activa y F3 los vuelca a CSV.
+    """
+    SCREENS = ("SELECT_N", "MAIN_MENU", "TREE_TO_FUNC", "FUNC_TO_TREE")
+    PHASES = ("eventos", "update", "draw")
+    PERCENTILES = (50, 95, 99)
+    # El panel se refresca como mucho cada REFRESH_MS con datos nuevos
+    REFRESH_MS = 250
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.times = np.zeros((capacity, len(self.PHASES)), dtype=np.float32)
+        self.screen_ids = np.zeros(capacity, dtype=np.uint8)
+        self.frame_ids = np.zeros(capacity, dtype=np.int64)
+        self.head = 0
+        self.count = 0
+        self.frames = 0
+        self.visible = False
+        self.rect = pygame.Rect(WIDTH - 330, HEIGHT - 140, 320, 130)
+        self._shown_frames = -1
+        self._shown_at = 0
+
+    def record(self, screen_name, events_ms, update_ms, draw_ms):
+        i = self.head
+        self.times[i] = (events_ms, update_ms, draw_ms)
+        self.screen_ids[i] = self.SCREENS.index(screen_name)
+        self.frame_ids[i] = self.frames
+        self.frames += 1
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def samples(self, screen_name=None):
+        """Muestras del búfer en orden cronológico (de una pantalla o de todas)"""
+        order = (np.arange(self.count) + self.head - self.count) % self.capacity
+        if screen_name is not None:
+            order = order[self.screen_ids[order] == self.SCREENS.index(screen_name)]
+        return order
+
+    def percentiles(self, screen_name):
+        """Fila por fase, más el total, con los percentiles en ms (None si no hay datos)"""
+        idx = self.samples(screen_name)
+        if not len(idx):
+            return None
+        times = self.times[idx]
+        table = np.column_stack([times, times.sum(axis=1)])
+        return np.percentile(table, self.PERCENTILES, axis=0).T
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._shown_frames = -1
+
+    def stale(self, now):
+        """Hay datos nuevos que aún no muestra el panel"""
+        if self._shown_frames < 0:
+            return True
+        return self.frames != self._shown_frames and now - self._shown_at >= self.REFRESH_MS
+
+    def draw_overlay(self, surface, screen_name, now):
+        """
+        Panel opaco con los percentiles; no necesita redibujar lo que tapa.
+        El texto cambia en cada refresco, así que no pasa por TEXT_CACHE.
+        """
+        self._shown_frames = self.frames
+        self._shown_at = now
+        pygame.draw.rect(surface, COLORS['dark'], self.rect, border_radius=8)
+        x, y = self.rect.x + 12, self.rect.y + 10
+        idx = self.samples(screen_name)
+        title = f"{screen_name}  ({len(idx)} fotogramas)"
+        surface.blit(FONT_SMALL.render(title, True, COLORS['white']), (x, y))
+        y += 22
+        table = self.percentiles(screen_name)
+        rows = [("ms",) + tuple(f"p{p}" for p in self.PERCENTILES)]
+        if table is not None:
+            rows += [(name,) + tuple(f"{v:.2f}" for v in row)
+                     for name, row in zip(self.PHASES + ("total",), table)]
+        for r, cells in enumerate(rows):
+            color = COLORS['gray'] if r == 0 else COLORS['light']
+            for c, cell in enumerate(cells):
+                text = FONT_TINY.render(cell, True, color)
+                if c == 0:
+                    surface.blit(text, (x, y))
+                else:
+                    surface.blit(text, text.get_rect(topright=(x + 90 + 70 * c, y)))
+            y += 16
+        return self.rect
+
+    def to_csv(self, path):
+        """Vuelca el búfer (más antiguo primero); devuelve las filas escritas"""
+        idx = self.samples()
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("frame", "screen") + tuple(f"{p}_ms" for p in self.PHASES))
+            for i in idx.tolist():
+                writer.writerow([int(self.frame_ids[i]), self.SCREENS[self.screen_ids[i]]]
+                                + [f"{t:.3f}" for t in self.times[i].tolist()])
+        return len(idx)
 
 # ==============================================================================
 # APLICACIÓN PRINCIPAL
 # ==============================================================================
 
 class JoyalApplication:
+    # Sin entrada ni cambios durante este tiempo, el bucle deja de sondear
+    # a 60 FPS y se bloquea en pygame.event.wait hasta el siguiente evento
+    # o temporizador.
+    FPS = 60
+    IDLE_AFTER_MS = 500
+
     def __init__(self):
+        init_display()
         self.current_screen = "SELECT_N"
         self.clock = pygame.time.Clock()
         self.running = True
+        self.profiler = FrameProfiler()
         
         # Pantallas
         self.n_selection_screen = NSelectionScreen()
@@ -1451,14 +1993,42 @@ class JoyalApplication:
         
         # Inicializar con n=6
         inicializar_estructuras(6)
+
+    def active_screen(self):
+        return {
+            "SELECT_N": self.n_selection_screen,
+            "MAIN_MENU": self.main_menu_screen,
+            "TREE_TO_FUNC": self.tree_to_func_screen,
+            "FUNC_TO_TREE": self.func_to_tree_screen,
+        }[self.current_screen]
     
-    def run(self):
+    def wait_events(self):
+        """Bloquea hasta el próximo evento o temporizador de la pantalla activa"""
+        timeout = self.active_screen().next_timer()
+        first = pygame.event.wait() if timeout is None else pygame.event.wait(max(1, timeout))
+        events = [] if first.type == pygame.NOEVENT else [first]
+        return events + pygame.event.get()
+
+    def run(self, max_frames=None):
+        """Bucle principal; con max_frames termina tras ese número de vueltas"""
+        quiet_ms = 0
+        frames = 0
         while self.running:
-            dt = self.clock.tick(60)  # 60 FPS
+            if max_frames is not None and frames >= max_frames:
+                break
+            frames += 1
+            if quiet_ms >= self.IDLE_AFTER_MS:
+                # Reposo: nada que dibujar hasta que llegue algo
+                events = self.wait_events()
+                dt = self.clock.tick()
+            else:
+                dt = self.clock.tick(self.FPS)
+                events = pygame.event.get()
             mouse_pos = pygame.mouse.get_pos()
+            t0 = time.perf_counter()
             
             # Manejar eventos
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
                 
@@ -1467,9 +2037,14 @@ class JoyalApplication:
                         self.running = False
                     elif event.key == pygame.K_F1:
                         self.show_help()
+                    elif event.key == pygame.K_F2:
+                        self.profiler.toggle()
+                    elif event.key == pygame.K_F3:
+                        self.dump_profile()
                 
                 # Procesar evento según pantalla actual
                 result = None
+                previous = self.current_screen
                 
                 if self.current_screen == "SELECT_N":
                     result = self.n_selection_screen.handle_event(event)
@@ -1503,34 +2078,57 @@ class JoyalApplication:
                     result = self.func_to_tree_screen.handle_event(event)
                     if result == "BACK":
                         self.current_screen = "MAIN_MENU"
+
+                # Todo evento salvo el movimiento del ratón puede cambiar el
+                # estado: se redibuja la pantalla completa (el hover de los
+                # botones ya marca sus propios rectángulos).
+                if event.type != pygame.MOUSEMOTION or self.current_screen != previous:
+                    self.active_screen().invalidate()
             
-            # Actualizar pantalla actual
-            if self.current_screen == "SELECT_N":
-                self.n_selection_screen.update(mouse_pos, dt)
-                self.n_selection_screen.draw(screen)
-            
-            elif self.current_screen == "MAIN_MENU":
-                self.main_menu_screen.update(mouse_pos, dt)
-                self.main_menu_screen.draw(screen)
-            
-            elif self.current_screen == "TREE_TO_FUNC":
-                self.tree_to_func_screen.update(mouse_pos, dt)
-                self.tree_to_func_screen.draw(screen)
-            
-            elif self.current_screen == "FUNC_TO_TREE":
-                self.func_to_tree_screen.update(mouse_pos, dt)
-                self.func_to_tree_screen.draw(screen)
+            t1 = time.perf_counter()
             
-            # Actualizar pantalla
-            pygame.display.flip()
+            # Actualizar pantalla actual
+            active = self.active_screen()
+            active.update(mouse_pos, dt)
+            rects = active.collect_dirty()
+            t2 = time.perf_counter()
+
+            # Presentar sólo las zonas modificadas
+            if rects:
+                screen.set_clip(rects[0].unionall(rects[1:]))
+                active.draw(screen)
+                screen.set_clip(None)
+            t3 = time.perf_counter()
+
+            # Sólo cuentan los fotogramas con trabajo: en reposo no hay nada
+            # que medir (y el propio panel no debe despertar el bucle)
+            if events or rects:
+                self.profiler.record(self.current_screen, (t1 - t0) * 1000,
+                                     (t2 - t1) * 1000, (t3 - t2) * 1000)
+            now = pygame.time.get_ticks()
+            if self.profiler.visible and (rects or self.profiler.stale(now)):
+                rects.append(self.profiler.draw_overlay(screen, self.current_screen, now))
+            if rects:
+                pygame.display.update(rects)
+
+            # Con interacción se vuelve de inmediato a la frecuencia completa;
+            # los redibujos por temporizador (parpadeo del cursor) no cuentan
+            quiet_ms = 0 if events else quiet_ms + dt
         
         pygame.quit()
     
+    def dump_profile(self, path="perfil_fotogramas.csv"):
+        rows = self.profiler.to_csv(path)
+        print(f"Perfil: {rows} fotogramas guardados en {path}")
+
     def show_help(self):
         print("Ayuda:")
         print("F1: Mostrar esta ayuda")
+        print("F2: Mostrar/ocultar los tiempos por fotograma (p50/p95/p99)")
+        print("F3: Guardar los tiempos por fotograma en perfil_fotogramas.csv")
         print("ESC: Salir de la aplicación")
         print("Click izquierdo: Interactuar con elementos")
+        print("Rueda: Acercar/alejar el grafo; arrastre (botón derecho): desplazarlo; Inicio: vista original")
         print("Modo 1: Construya un árbol y obtenga la función correspondiente")
         print("Modo 2: Ingrese una función y visualice el árbol correspondiente")
 
@@ -0,0 +1,95 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Medición del arranque                                    ║
+# ║                                                                            ║
+# ║     Cada medición corre en un intérprete nuevo (importación en frío):      ║
+# ║     tiempo de importar joyal_engine y Demostracion_Joyal, y tiempo hasta   ║
+# ║     el primer fotograma presentado por JoyalApplication.                   ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+StartupReport = namedtuple("StartupReport", "name runs median best")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Programas que se ejecutan en el proceso hijo; imprimen los ms medidos
+PROBES = {
+    "import_engine": """
+t0 = time.perf_counter()
+import joyal_engine
+ms = (time.perf_counter() - t0) * 1000
+""",
+    "import_app": """
+t0 = time.perf_counter()
+import Demostracion_Joyal
+ms = (time.perf_counter() - t0) * 1000
+""",
+    "first_frame": """
+t0 = time.perf_counter()
+import Demostracion_Joyal
+Demostracion_Joyal.JoyalApplication().run(max_frames=1)
+ms = (time.perf_counter() - t0) * 1000
+""",
+}
+
+# ==============================================================================
+# MEDICIÓN
+# ==============================================================================
+
+def measure(name, env=None):
+    """Ejecuta una sonda en un intérprete nuevo; devuelve (ms medidos, ms del proceso)"""
+    code = "import time, json\n" + PROBES[name] + "print(json.dumps(ms))\n"
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    wall = (time.perf_counter() - t0) * 1000
+    return json.loads(out.strip().splitlines()[-1]), wall
+
+
+def bench(names=tuple(PROBES), repeat=5, window=False):
+    """Mediana y mejor tiempo de cada sonda (dentro del hijo y del proceso completo)"""
+    env = dict(os.environ)
+    if not window:
+        env.setdefault("SDL_VIDEODRIVER", "dummy")
+    reports = []
+    for name in names:
+        inner, wall = zip(*(measure(name, env) for _ in range(repeat)))
+        reports.append(StartupReport(name, repeat, statistics.median(inner), min(inner)))
+        reports.append(StartupReport(name + " (proceso)", repeat, statistics.median(wall), min(wall)))
+    return reports
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mide la importación en frío y el tiempo hasta el primer fotograma.")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por medición")
+    parser.add_argument("--window", action="store_true",
+                        help="abrir una ventana real (por defecto, controlador de vídeo dummy)")
+    parser.add_argument("--json", action="store_true", help="salida en JSON")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("Se necesita al menos una repetición")
+
+    reports = bench(repeat=args.repeat, window=args.window)
+    if args.json:
+        print(json.dumps([r._asdict() for r in reports], indent=2))
+    else:
+        for r in reports:
+            print(f"{r.name:<28} mediana {r.median:8.1f} ms   mejor {r.best:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
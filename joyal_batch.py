@@ -0,0 +1,232 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Biyección de Joyal por lotes (NumPy)                     ║
+# ║                                                                            ║
+# ║     Versiones vectorizadas de joyal_engine para procesar muchas            ║
+# ║     funciones a la vez: cada fila de un arreglo (B, n) es una función.     ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Igual que joyal_engine.CycleDecomposition pero fila a fila:
+#   cyclic    máscara (B, n) de puntos cíclicos
+#   cycle_id  ciclo al que llega cada vértice (mismo orden que decompose)
+#   depth     pasos hasta el ciclo (0 si el vértice es cíclico)
+#   root      primer punto cíclico alcanzado
+BatchDecomposition = namedtuple("BatchDecomposition", "cyclic cycle_id depth root")
+
+SamplerStats = namedtuple("SamplerStats", "trees seconds trees_per_second")
+
+# Elementos (filas × n) por lote cuando no se indica el tamaño
+DEFAULT_BATCH_ELEMENTS = 1 << 20
+
+# ==============================================================================
+# UTILIDADES
+# ==============================================================================
+
+def as_function_batch(F):
+    """Convierte F a un arreglo (B, n) de índices y valida el rango"""
+    F = np.asarray(F)
+    if F.ndim == 1:
+        F = F[None, :]
+    if F.ndim != 2 or F.shape[1] == 0:
+        raise ValueError("Se esperaba un arreglo (B, n) de funciones.")
+    n = F.shape[1]
+    if F.size and (F.min() < 0 or F.max() >= n):
+        raise ValueError(f"Valores deben estar entre 1 y {n}.")
+    dtype = np.int32 if n < 2**31 else np.int64
+    return F.astype(dtype, copy=False)
+
+
+def _num_doublings(n):
+    """Menor K con 2^K ≥ n"""
+    return max(1, (n - 1).bit_length())
+
+
+def _powers(F, K):
+    """[F, F^2, F^4, ..., F^(2^K)] por elevación al cuadrado (pointer jumping)"""
+    powers = [F]
+    for _ in range(K):
+        P = powers[-1]
+        powers.append(np.take_along_axis(P, P, axis=1))
+    return powers
+
+# ==============================================================================
+# DESCOMPOSICIÓN EN CICLOS
+# ==============================================================================
+
+def _cyclic_from_power(G):
+    """Puntos cíclicos: la imagen de f^N con N ≥ n es exactamente el ciclo"""
+    B, n = G.shape
+    cyclic = np.zeros((B, n), dtype=bool)
+    cyclic[np.arange(B)[:, None], G] = True
+    return cyclic
+
+
+def cyclic_mask(F):
+    """Máscara (B, n) de puntos cíclicos de cada función"""
+    F = as_function_batch(F)
+    B, n = F.shape
+    # Índices planos (fila * n + v): cada cuadrado es un único np.take
+    offsets = (np.arange(B, dtype=np.int64) * n)[:, None]
+    G = (F + offsets).ravel()
+    for _ in range(_num_doublings(n)):
+        G = np.take(G, G)
+    return _cyclic_from_power((G.reshape(B, n) - offsets).astype(F.dtype))
+
+
+def decompose_batch(F):
+    """
+    Descomposición ciclos/colas de cada fila de F.
+
+    Todo se resuelve con O(log n) pasadas vectorizadas sobre las potencias
+    F^(2^j): la máscara cíclica sale de la imagen de F^(2^K), el
+    representante de cada ciclo (su vértice mínimo) de propagar mínimos
+    por duplicación, y la profundidad de colas de una búsqueda binaria
+    sobre las potencias (binary lifting).
+    """
+    F = as_function_batch(F)
+    B, n = F.shape
+    K = _num_doublings(n)
+    powers = _powers(F, K)
+    cyclic = _cyclic_from_power(powers[K])
+
+    verts = np.broadcast_to(np.arange(n, dtype=F.dtype), (B, n))
+    rows = np.arange(B)[:, None]
+
+    # Representante = mínimo del ciclo; tras K duplicaciones también las colas
+    # lo heredan, porque recorren su ciclo completo en menos de 2^K pasos.
+    rep = np.where(cyclic, verts, n).astype(F.dtype)
+    for j in range(K):
+        rep = np.minimum(rep, np.take_along_axis(rep, powers[j], axis=1))
+
+    # Los ciclos se numeran como en decompose: por el menor vértice de su
+    # componente, que es el primero desde el que se descubren.
+    comp_min = np.full(B * n, n, dtype=F.dtype)
+    np.minimum.at(comp_min, (rows * n + rep).ravel(), verts.ravel())
+    comp_min = comp_min.reshape(B, n)
+    is_rep = cyclic & (rep == verts)
+    present = np.zeros((B, n), dtype=np.int32)
+    present[np.nonzero(is_rep)[0], comp_min[is_rep]] = 1
+    rank = np.cumsum(present, axis=1) - 1
+    cycle_id = np.take_along_axis(rank, np.take_along_axis(comp_min, rep, axis=1), axis=1)
+
+    # Profundidad: saltar 2^j pasos mientras no se caiga en un punto cíclico
+    cur = np.array(verts)
+    depth = np.zeros((B, n), dtype=F.dtype)
+    for j in range(K - 1, -1, -1):
+        nxt = np.take_along_axis(powers[j], cur, axis=1)
+        move = ~cyclic[rows, nxt]
+        cur = np.where(move, nxt, cur)
+        depth += move.astype(F.dtype) << j
+    depth = np.where(cyclic, 0, depth + 1)
+    root = np.where(cyclic, verts, np.take_along_axis(F, cur, axis=1))
+
+    return BatchDecomposition(cyclic, cycle_id.astype(F.dtype), depth, root)
+
+# ==============================================================================
+# FUNCIÓN → ÁRBOL
+# ==============================================================================
+
+def functions_to_parents(F):
+    """
+    Versión por lotes de joyal_engine.function_to_parents.
+
+    Devuelve (parents, starts): cada fila de parents es el árbol de la
+    función enraizado en el final de la vértebra (-1 en la raíz) y starts
+    el inicio de la vértebra. Con c_0 < ... < c_k los puntos cíclicos,
+    f(c_i) cuelga de f(c_{i-1}); el anterior cíclico de cada posición se
+    obtiene con un máximo acumulado.
+    """
+    F = as_function_batch(F)
+    B, n = F.shape
+    cyclic = cyclic_mask(F)
+    rows = np.arange(B)[:, None]
+
+    last = np.maximum.accumulate(np.where(cyclic, np.arange(n), -1), axis=1)
+    prev = np.empty_like(last)
+    prev[:, 0] = -1
+    prev[:, 1:] = last[:, :-1]
+
+    parents = F.copy()
+    r, c = np.nonzero(cyclic)
+    p = prev[r, c]
+    parents[r, F[r, c]] = np.where(p >= 0, F[r, np.maximum(p, 0)], -1)
+    starts = F[rows[:, 0], last[:, -1]]
+    return parents, starts
+
+# ==============================================================================
+# MUESTREO UNIFORME DE ÁRBOLES
+# ==============================================================================
+
+def sample_trees(n, count, seed=None, batch=None):
+    """
+    Genera count árboles etiquetados uniformes de n vértices, por lotes.
+
+    Una función uniforme da un triple (árbol, inicio, fin) uniforme, y
+    cada árbol aparece en exactamente n^2 triples: el árbol es uniforme.
+    Entrega arreglos (b, n) de padres como los de functions_to_parents.
+    """
+    rng = np.random.default_rng(seed)
+    batch = batch or max(1, DEFAULT_BATCH_ELEMENTS // n)
+    remaining = count
+    while remaining > 0:
+        b = min(batch, remaining)
+        F = rng.integers(0, n, size=(b, n), dtype=np.int32)
+        yield functions_to_parents(F)[0]
+        remaining -= b
+
+
+def write_trees(out, n, count, seed=None, batch=None, fmt="txt"):
+    """
+    Escribe count árboles aleatorios en el archivo abierto out.
+
+    fmt="txt": una línea por árbol con los padres 1-indexados (0 = raíz).
+    fmt="raw": filas int32 0-indexadas (-1 = raíz) sin cabecera.
+    Devuelve SamplerStats con el rendimiento obtenido.
+    """
+    t0 = time.perf_counter()
+    for parents in sample_trees(n, count, seed, batch):
+        if fmt == "raw":
+            out.write(parents.astype(np.int32, copy=False).tobytes())
+        else:
+            np.savetxt(out, parents + 1, fmt="%d")
+    seconds = time.perf_counter() - t0
+    return SamplerStats(count, seconds, count / seconds if seconds > 0 else float("inf"))
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Muestrea árboles etiquetados uniformes mediante la biyección de Joyal.")
+    parser.add_argument("n", type=int, help="número de vértices")
+    parser.add_argument("count", type=int, help="número de árboles")
+    parser.add_argument("-o", "--output", help="archivo de salida (por defecto, stdout)")
+    parser.add_argument("--seed", type=int, default=None, help="semilla para reproducibilidad")
+    parser.add_argument("--batch", type=int, default=None, help="árboles por lote")
+    parser.add_argument("--format", choices=("txt", "raw"), default="txt")
+    args = parser.parse_args(argv)
+    if args.n < 1:
+        parser.error("El número debe ser al menos 1")
+
+    if args.output:
+        with open(args.output, "wb") as out:
+            stats = write_trees(out, args.n, args.count, args.seed, args.batch, args.format)
+    else:
+        stats = write_trees(sys.stdout.buffer, args.n, args.count, args.seed, args.batch, args.format)
+
+    print(f"{stats.trees:,} árboles en {stats.seconds:.2f} s "
+          f"({stats.trees_per_second * 60:,.0f} árboles/min)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
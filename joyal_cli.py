@@ -0,0 +1,150 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Conversión por lotes función → árbol                     ║
+# ║                                                                            ║
+# ║     Lee funciones (una por línea, como en el modo 2: "2,3,1,5,5,4") y      ║
+# ║     escribe en JSON Lines las aristas del árbol, la vértebra y la          ║
+# ║     notación cíclica. La entrada se procesa en bloques repartidos en un    ║
+# ║     pool de procesos, con un número acotado de bloques en vuelo y en el    ║
+# ║     mismo orden de la entrada.                                             ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from joyal_engine import decompose, function_to_tree, parse_function
+
+CliReport = namedtuple("CliReport", "lines errors seconds")
+
+# ==============================================================================
+# CONVERSIÓN
+# ==============================================================================
+
+def convert_line(lineno, text):
+    """
+    Registro (dict) para una línea de entrada; con "error" si no es una
+    función válida. Los vértices se escriben 1-indexados, como en la interfaz.
+    """
+    try:
+        f = parse_function(text)
+    except ValueError as e:
+        return {"line": lineno, "error": str(e)}
+
+    edges, start, end = function_to_tree(f)
+    cycles = decompose(f).cycles
+    # function_to_tree pone primero las aristas de la vértebra, una menos
+    # que puntos cíclicos
+    k = sum(map(len, cycles)) - 1
+    return {
+        "line": lineno,
+        "n": len(f),
+        "edges": [[u + 1, v + 1] for u, v in zip(edges.u, edges.v)],
+        "start": start + 1,
+        "end": end + 1,
+        "spine": [start + 1] + [v + 1 for v in edges.v[:k]],
+        "cycles": " ".join("(" + " ".join(str(x + 1) for x in cyc) + ")" for cyc in cycles),
+    }
+
+
+def convert_block(block):
+    """
+    Convierte un bloque [(lineno, text), ...] en el proceso del pool.
+    Devuelve (texto JSON Lines del bloque, líneas con error).
+    """
+    records = [convert_line(lineno, text) for lineno, text in block]
+    errors = sum("error" in rec for rec in records)
+    text = "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records)
+    return text, errors
+
+# ==============================================================================
+# FLUJO ACOTADO
+# ==============================================================================
+
+def read_blocks(fh, block_size):
+    """Bloques de (número de línea, texto), saltando líneas vacías y comentarios"""
+    lines = ((i, line.strip()) for i, line in enumerate(fh, 1))
+    lines = ((i, text) for i, text in lines if text and not text.startswith("#"))
+    while True:
+        block = list(islice(lines, block_size))
+        if not block:
+            return
+        yield block
+
+
+def convert_stream(fh, out, workers=None, block_size=256, in_flight=None):
+    """
+    Convierte fh en out. Como mucho in_flight bloques están en el pool a la
+    vez (por defecto, dos por proceso), así que la memoria no depende del
+    tamaño de la entrada; los resultados se escriben en orden de entrada.
+    """
+    t0 = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    in_flight = in_flight or 2 * workers
+    lines = errors = 0
+
+    def write(block, result):
+        nonlocal lines, errors
+        text, bad = result
+        out.write(text)
+        lines += len(block)
+        errors += bad
+
+    if workers == 1:
+        for block in read_blocks(fh, block_size):
+            write(block, convert_block(block))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for block in read_blocks(fh, block_size):
+                if len(pending) >= in_flight:
+                    done, fut = pending.popleft()
+                    write(done, fut.result())
+                pending.append((block, pool.submit(convert_block, block)))
+            while pending:
+                done, fut = pending.popleft()
+                write(done, fut.result())
+
+    return CliReport(lines, errors, time.perf_counter() - t0)
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convierte funciones en árboles vertebrados (JSON Lines).")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="archivo con una función por línea (p. ej. 2,3,1,5,5,4); - para stdin")
+    parser.add_argument("-o", "--output", default="-", help="archivo de salida; - para stdout")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--block", type=int, default=256, help="líneas por tarea")
+    parser.add_argument("--in-flight", type=int, default=None,
+                        help="bloques en vuelo como máximo (por defecto, dos por proceso)")
+    args = parser.parse_args(argv)
+    if args.block < 1:
+        parser.error("El bloque debe tener al menos una línea")
+
+    fh = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        report = convert_stream(fh, out, args.workers, args.block, args.in_flight)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{report.lines} líneas, {report.errors} con error, en {report.seconds:.1f} s",
+          file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
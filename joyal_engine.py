@@ -0,0 +1,715 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Motor de la biyección de Joyal                           ║
+# ║                                                                            ║
+# ║     Lógica pura (sin pygame ni estado global) compartida por la            ║
+# ║     interfaz y por los procesos por lotes.                                 ║
+# ║                                                                            ║
+# ║     Convenciones:                                                          ║
+# ║         - Vértices 0..n-1 (la interfaz muestra 1..n).                      ║
+# ║         - Una función es una secuencia f con f[i] en 0..n-1                ║
+# ║           (el motor devuelve array('i')).                                  ║
+# ║         - Un árbol es una lista de aristas (u, v) no dirigidas             ║
+# ║           (cualquier iterable de pares; el motor devuelve EdgeList).       ║
+# ║         - La vértebra es el camino start → end del árbol.                  ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from collections.abc import Sequence
+
+# ==============================================================================
+# REPRESENTACIONES COMPACTAS
+# ==============================================================================
+#
+# Una lista de tuplas cuesta ~70 bytes por arista; estas clases guardan los
+# mismos datos en array('i') (4 bytes por entero) y se convierten a las
+# formas antiguas sin copias innecesarias.
+
+class EdgeList:
+    """Lista de aristas (u, v) guardada en dos columnas array('i')"""
+    __slots__ = ("u", "v")
+
+    def __init__(self, pairs=()):
+        self.u = array('i')
+        self.v = array('i')
+        for a, b in pairs:
+            self.u.append(a)
+            self.v.append(b)
+
+    @classmethod
+    def from_path(cls, path):
+        """Aristas consecutivas de un camino"""
+        edges = cls()
+        edges.u = array('i', path[:-1])
+        edges.v = array('i', path[1:])
+        return edges
+
+    def append(self, edge):
+        a, b = edge
+        self.u.append(a)
+        self.v.append(b)
+
+    def clear(self):
+        del self.u[:]
+        del self.v[:]
+
+    def __len__(self):
+        return len(self.u)
+
+    def __iter__(self):
+        return zip(self.u, self.v)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            edges = EdgeList()
+            edges.u = self.u[i]
+            edges.v = self.v[i]
+            return edges
+        return self.u[i], self.v[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, (EdgeList, Sequence)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"EdgeList({self.to_list()!r})"
+
+    def to_list(self):
+        return list(zip(self.u, self.v))
+
+
+class UnionFind:
+    """
+    Union-Find sobre array('i'): find iterativo con compresión de caminos,
+    unión por rango y contador de componentes en O(1).
+    """
+    __slots__ = ("parent", "rank", "components")
+
+    def __init__(self, n):
+        self.parent = array('i', range(n))
+        self.rank = bytearray(n)
+        self.components = n
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra == rb:
+            return False
+        if self.rank[ra] < self.rank[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        if self.rank[ra] == self.rank[rb]:
+            self.rank[ra] += 1
+        self.components -= 1
+        return True
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
+
+# ==============================================================================
+# VALIDACIÓN
+# ==============================================================================
+
+def validate_function(f):
+    """Verifica que f sea una función {0..n-1} → {0..n-1}"""
+    n = len(f)
+    if n == 0:
+        raise ValueError("La función no puede ser vacía.")
+    for v in f:
+        if not 0 <= v < n:
+            raise ValueError(f"Valores deben estar entre 1 y {n}.")
+
+
+def parse_function(text, n=None):
+    """
+    Lee una función escrita como en la interfaz: valores 1-indexados
+    separados por comas (p. ej. "2,3,1,5,5,4"). Sin n, el tamaño es el
+    número de valores. Devuelve array('i') 0-indexado.
+    """
+    text = text.strip()
+    if not text:
+        raise ValueError("Ingrese la función.")
+    try:
+        vals = [int(x) for x in text.split(",") if x.strip()]
+    except ValueError:
+        raise ValueError("Formato inválido: use números separados por comas.") from None
+    if n is None:
+        n = len(vals)
+    elif len(vals) != n:
+        raise ValueError(f"Debe ingresar exactamente {n} valores.")
+    # Antes de array('i'): un valor enorme daría OverflowError
+    if any(not 1 <= v <= n for v in vals):
+        raise ValueError(f"Valores deben estar entre 1 y {n}.")
+    return array('i', (v - 1 for v in vals))
+
+# ==============================================================================
+# FUNCIÓN → ÁRBOL
+# ==============================================================================
+
+# Descomposición de f en ciclos y colas:
+#   cycles[c]    lista de vértices del ciclo c, en el orden en que se recorre
+#   cycle_id[v]  ciclo al que llega v
+#   depth[v]     pasos hasta llegar a un punto cíclico (0 si v es cíclico)
+#   root[v]      primer punto cíclico alcanzado desde v
+CycleDecomposition = namedtuple("CycleDecomposition", "cycles cycle_id depth root")
+
+_NEW, _ON_PATH, _DONE = 0, 1, 2
+
+
+def decompose(f):
+    """
+    Descomposición ciclos/colas de f en tiempo O(n).
+
+    Cada vértice se visita una sola vez: se sigue f marcando el camino
+    actual (_ON_PATH) y su posición en él; si el camino se cierra sobre sí
+    mismo se obtiene un ciclo nuevo, y en cualquier caso las colas se
+    resuelven de atrás hacia adelante a partir del vértice ya terminado.
+    """
+    n = len(f)
+    state = array('b', bytes(n))
+    pos = array('i', bytes(4 * n))
+    cycle_id = array('i', bytes(4 * n))
+    depth = array('i', bytes(4 * n))
+    root = array('i', bytes(4 * n))
+    cycles = []
+    path = []
+
+    for i in range(n):
+        if state[i] != _NEW:
+            continue
+        v = i
+        while state[v] == _NEW:
+            state[v] = _ON_PATH
+            pos[v] = len(path)
+            path.append(v)
+            v = f[v]
+
+        if state[v] == _ON_PATH:
+            k = pos[v]
+            cid = len(cycles)
+            cycle = path[k:]
+            for u in cycle:
+                state[u] = _DONE
+                cycle_id[u] = cid
+                root[u] = u
+            cycles.append(cycle)
+            del path[k:]
+
+        # v ya está terminado: toda la cola comparte su ciclo y su raíz
+        cid, d, r = cycle_id[v], depth[v], root[v]
+        for u in reversed(path):
+            d += 1
+            state[u] = _DONE
+            cycle_id[u] = cid
+            depth[u] = d
+            root[u] = r
+        path.clear()
+
+    return CycleDecomposition(cycles, cycle_id, depth, root)
+
+
+def find_cycles(f):
+    """Ciclos de f en el orden en que se descubren recorriendo 0..n-1"""
+    return decompose(f).cycles
+
+
+def spine_from_function(f):
+    """
+    Vértebra (camino start → end) codificada por f.
+
+    Si c_0 < c_1 < ... < c_k son los puntos cíclicos, la vértebra es
+    f(c_k), f(c_{k-1}), ..., f(c_0): el emparejamiento inverso al de
+    tree_to_function (sorted(vértebra) ↔ reversed(vértebra)).
+    """
+    depth = decompose(f).depth
+    return [f[c] for c in range(len(f) - 1, -1, -1) if depth[c] == 0]
+
+
+def function_to_tree(f):
+    """
+    Árbol vertebrado asociado a f.
+
+    Devuelve (edges, start, end) con edges un EdgeList. Las primeras
+    aristas recorren la vértebra de start a end; el resto son (v, f(v))
+    para cada vértice no cíclico, en orden creciente de v.
+    """
+    validate_function(f)
+    spine = spine_from_function(f)
+    on_spine = [False] * len(f)
+    for v in spine:
+        on_spine[v] = True
+
+    edges = EdgeList.from_path(spine)
+    # Los vértices cíclicos son exactamente los de la vértebra
+    for v, fv in enumerate(f):
+        if not on_spine[v]:
+            edges.u.append(v)
+            edges.v.append(fv)
+    return edges, spine[0], spine[-1]
+
+def function_to_parents(f):
+    """
+    Árbol vertebrado de f como arreglo de padres enraizado en end.
+
+    parent[v] = f(v) fuera de la vértebra; en ella cada f(c_i) cuelga de
+    f(c_{i-1}) y f(c_0) = end es la raíz (-1). La vértebra es la cadena
+    de ancestros de start = f(c_k).
+    """
+    depth = decompose(f).depth
+    parent = array('i', f)
+    prev = -1
+    for c in range(len(f)):
+        if depth[c] == 0:
+            parent[f[c]] = f[prev] if prev >= 0 else -1
+            prev = c
+    return parent
+
+# ==============================================================================
+# ACTUALIZACIÓN INCREMENTAL
+# ==============================================================================
+
+def _undirected(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+class IncrementalJoyal:
+    """
+    Árbol vertebrado de una función editada valor a valor.
+
+    Guarda f, la marca on_cycle de cada vértice y los puntos cíclicos
+    ordenados (cyclic, mantenida con bisect). set(i, j) sólo recorre el
+    ciclo que pasaba por i y el camino desde j, y devuelve las aristas
+    del árbol que entran y salen. Las aristas no son dirigidas: se
+    comparan y devuelven como (min, max), así que una arista que sólo
+    cambia de orientación no aparece.
+    """
+    __slots__ = ("f", "on_cycle", "cyclic")
+
+    def __init__(self, f):
+        validate_function(f)
+        self.f = array('i', f)
+        depth = decompose(self.f).depth
+        self.on_cycle = bytearray(d == 0 for d in depth)
+        self.cyclic = [c for c in range(len(f)) if depth[c] == 0]
+
+    def spine(self):
+        """Vértebra f(c_k), ..., f(c_0), como spine_from_function"""
+        f = self.f
+        return [f[c] for c in reversed(self.cyclic)]
+
+    def tree(self):
+        """(edges, start, end) con el mismo orden que function_to_tree"""
+        spine = self.spine()
+        edges = EdgeList.from_path(spine)
+        on_cycle = self.on_cycle
+        for v, fv in enumerate(self.f):
+            if not on_cycle[v]:
+                edges.u.append(v)
+                edges.v.append(fv)
+        return edges, spine[0], spine[-1]
+
+    def _spine_edges(self, positions, value):
+        # Arista (f(c_{p+1}), f(c_p)) de la vértebra para cada posición p
+        cyc = self.cyclic
+        return Counter(_undirected(value(cyc[p + 1]), value(cyc[p]))
+                       for p in positions if 0 <= p < len(cyc) - 1)
+
+    def set(self, i, j):
+        """
+        f[i] = j. Devuelve (añadidas, quitadas): listas de aristas
+        (min, max) del árbol; vacías si f[i] ya valía j.
+        """
+        f, on_cycle, cyc = self.f, self.on_cycle, self.cyclic
+        if not 0 <= i < len(f):
+            raise ValueError(f"Vértices deben estar entre 1 y {len(f)}.")
+        if not 0 <= j < len(f):
+            raise ValueError(f"Valores deben estar entre 1 y {len(f)}.")
+        old = f[i]
+        if old == j:
+            return [], []
+        before = lambda v: old if v == i else f[v]
+
+        # El ciclo que pasaba por i se rompe (los demás no cambian)
+        broken = []
+        if on_cycle[i]:
+            v = i
+            while True:
+                broken.append(v)
+                v = f[v]
+                if v == i:
+                    break
+        for v in broken:
+            on_cycle[v] = 0
+
+        # Desde j se llega a un ciclo que ya existía o se cierra uno nuevo en i
+        f[i] = j
+        path = []
+        v = j
+        while not on_cycle[v] and v != i:
+            path.append(v)
+            v = f[v]
+        formed = path + [i] if v == i else []
+        for v in formed:
+            on_cycle[v] = 1
+
+        lost = set(broken).difference(formed)
+        gained = set(formed).difference(broken)
+        was_cyclic = bool(broken)
+
+        # Aristas de la vértebra junto a las posiciones afectadas, antes...
+        moved = set()
+        for c in lost | ({i} if was_cyclic else set()):
+            p = bisect_left(cyc, c)
+            moved.update((p - 1, p))
+        for c in gained:
+            moved.add(bisect_left(cyc, c) - 1)
+        old_edges = self._spine_edges(moved, before)
+
+        for c in lost:
+            del cyc[bisect_left(cyc, c)]
+        for c in gained:
+            insort(cyc, c)
+
+        # ... y después
+        moved = set()
+        for c in gained | ({i} if on_cycle[i] else set()):
+            p = bisect_left(cyc, c)
+            moved.update((p - 1, p))
+        for c in lost:
+            moved.add(bisect_left(cyc, c) - 1)
+        new_edges = self._spine_edges(moved, f.__getitem__)
+
+        # Ramas (v, f(v)) de los vértices que cambian de papel y de i
+        for v in gained | ({i} if not was_cyclic else set()):
+            old_edges[_undirected(v, before(v))] += 1
+        for v in lost | ({i} if not on_cycle[i] else set()):
+            new_edges[_undirected(v, f[v])] += 1
+
+        return list((new_edges - old_edges).elements()), list((old_edges - new_edges).elements())
+
+# ==============================================================================
+# ÁRBOL → FUNCIÓN
+# ==============================================================================
+
+def tree_csr(n, edges):
+    """
+    Adyacencia compacta (CSR) de un grafo no dirigido.
+
+    Los vecinos de v son targets[offsets[v]:offsets[v+1]].
+    """
+    offsets = array('i', bytes(4 * (n + 1)))
+    for a, b in edges:
+        offsets[a + 1] += 1
+        offsets[b + 1] += 1
+    for v in range(n):
+        offsets[v + 1] += offsets[v]
+
+    targets = array('i', bytes(4 * offsets[n]))
+    fill = offsets[:n]
+    for a, b in edges:
+        targets[fill[a]] = b
+        fill[a] += 1
+        targets[fill[b]] = a
+        fill[b] += 1
+    return offsets, targets
+
+
+def parents_towards(offsets, targets, root):
+    """
+    BFS sobre la CSR desde root.
+
+    parent[v] es el vecino de v más cercano a root (-1 para root y para
+    los vértices no alcanzados); order es el orden de visita.
+    """
+    n = len(offsets) - 1
+    parent = array('i', [-1]) * n
+    visited = bytearray(n)
+    visited[root] = 1
+    order = array('i', [root])
+    head = 0
+    while head < len(order):
+        v = order[head]
+        head += 1
+        for k in range(offsets[v], offsets[v + 1]):
+            u = targets[k]
+            if not visited[u]:
+                visited[u] = 1
+                parent[u] = v
+                order.append(u)
+    return parent, order
+
+
+def spine_from_parents(parent, start, end):
+    """Camino start → end siguiendo parent (orientado hacia end)"""
+    spine = [start]
+    v = start
+    while v != end:
+        v = parent[v]
+        if v == -1:
+            raise ValueError("start y end no están conectados.")
+        spine.append(v)
+    return spine
+
+
+def orient_tree(edges, start, end, n=None):
+    """
+    Vértebra y orientación del árbol hacia end.
+
+    Devuelve (spine, parent): spine es el camino start → end y parent[v]
+    el siguiente vértice de v en su camino hacia end (-1 para end).
+    """
+    if n is None:
+        n = len(edges) + 1
+    parent, _ = parents_towards(*tree_csr(n, edges), end)
+    return spine_from_parents(parent, start, end), parent
+
+
+def function_from_orientation(spine, parent):
+    """
+    Función a partir de la vértebra y la orientación hacia end.
+
+    Fuera de la vértebra cada vértice apunta a su vecino hacia end; en
+    la vértebra se empareja sorted(vértebra) con reversed(vértebra). El
+    orden de la vértebra se obtiene marcando y recorriendo 0..n-1, sin
+    ordenar, así que todo es O(n).
+    """
+    n = len(parent)
+    on_spine = bytearray(n)
+    for v in spine:
+        on_spine[v] = 1
+    f = array('i', parent)
+    k = len(spine)
+    for v in range(n):
+        if on_spine[v]:
+            k -= 1
+            f[v] = spine[k]
+    return f
+
+
+def tree_to_function(edges, start, end):
+    """Función asociada al árbol vertebrado (edges, start, end)"""
+    return function_from_orientation(*orient_tree(edges, start, end))
+
+
+def tree_to_function_csr(offsets, targets, start, end):
+    """tree_to_function a partir de una adyacencia CSR (ver tree_csr)"""
+    parent, _ = parents_towards(offsets, targets, end)
+    return function_from_orientation(spine_from_parents(parent, start, end), parent)
+
+
+def tree_to_function_parent(parent, start):
+    """
+    tree_to_function a partir de un arreglo de padres enraizado en end.
+
+    La raíz (parent[end] == -1) es el extremo final de la vértebra, así
+    que no hace falta ningún recorrido: la vértebra son los ancestros de
+    start.
+    """
+    v = start
+    spine = [v]
+    while parent[v] != -1:
+        v = parent[v]
+        spine.append(v)
+    return function_from_orientation(spine, parent)
+
+# ==============================================================================
+# ÍNDICE DE ANCESTROS (LCA)
+# ==============================================================================
+
+class TreeIndex:
+    """
+    Árbol enraizado indexado una vez para elegir muchas vértebras.
+
+    Con saltos binarios (up[k][v] es el ancestro 2^k de v) el LCA cuesta
+    O(log n) y el camino start → end O(log n + longitud). Además mantiene
+    la orientación towards hacia el final actual: al cambiar el final de
+    e a e' sólo se invierten las aristas del camino e → e'.
+    """
+    __slots__ = ("n", "root", "parent", "depth", "up", "end", "towards")
+
+    def __init__(self, n, edges, root=0):
+        self.n = n
+        self.root = root
+        self.parent, order = parents_towards(*tree_csr(n, edges), root)
+        if len(order) != n:
+            raise ValueError("Las aristas no forman un árbol conexo.")
+        depth = array('i', bytes(4 * n))
+        parent = self.parent
+        for v in order[1:]:
+            depth[v] = depth[parent[v]] + 1
+        self.depth = depth
+
+        level = array('i', parent)
+        level[root] = root
+        self.up = [level]
+        for _ in range(max(1, (n - 1).bit_length()) - 1):
+            level = array('i', (level[u] for u in level))
+            self.up.append(level)
+
+        self.end = root
+        self.towards = array('i', parent)
+
+    def lca(self, a, b):
+        depth, up = self.depth, self.up
+        if depth[a] < depth[b]:
+            a, b = b, a
+        diff = depth[a] - depth[b]
+        k = 0
+        while diff:
+            if diff & 1:
+                a = up[k][a]
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        for level in reversed(up):
+            if level[a] != level[b]:
+                a, b = level[a], level[b]
+        return up[0][a]
+
+    def path(self, a, b):
+        """Camino a → b"""
+        parent = self.parent
+        top = self.lca(a, b)
+        left = [a]
+        while left[-1] != top:
+            left.append(parent[left[-1]])
+        right = []
+        v = b
+        while v != top:
+            right.append(v)
+            v = parent[v]
+        right.reverse()
+        return left + right
+
+    def set_end(self, end):
+        """Reorienta towards hacia end invirtiendo sólo el camino del final anterior a end"""
+        if end == self.end:
+            return
+        path = self.path(self.end, end)
+        towards = self.towards
+        for i in range(len(path) - 1):
+            towards[path[i]] = path[i + 1]
+        towards[end] = -1
+        self.end = end
+
+    def function(self, start, end=None):
+        """Función del árbol vertebrado (start, end); end por defecto el actual"""
+        if end is not None:
+            self.set_end(end)
+        spine = self.path(start, self.end)
+        f = array('i', self.towards)
+        for v, w in zip(sorted(spine), reversed(spine)):
+            f[v] = w
+        return f
+
+    def function_diff(self, start, end):
+        """
+        Valores {v: f(v)} en que la función de (start, end) difiere de
+        parent (la orientación hacia la raíz). Cuesta lo mismo que la
+        salida: el camino end → raíz más la vértebra (con su ordenación).
+        """
+        parent = self.parent
+        diff = {}
+        v = end
+        while parent[v] != -1:
+            diff[parent[v]] = v
+            v = parent[v]
+        spine = self.path(start, end)
+        for v, w in zip(sorted(spine), reversed(spine)):
+            diff[v] = w
+        return {v: w for v, w in diff.items() if w != parent[v]}
+
+    def function_diffs(self, pairs):
+        """function_diff de cada par (start, end), sin estado compartido"""
+        return [self.function_diff(start, end) for start, end in pairs]
+
+# ==============================================================================
+# RANGO / DES-RANGO
+# ==============================================================================
+#
+# Una función f se numera por sus valores leídos como dígitos en base n
+# (f[0] el más significativo), de modo que los árboles vertebrados quedan
+# numerados en [0, n^n) a través de la biyección. Para árboles sin
+# vértebra se fija la vértebra 0 → n-1: su función cumple f(0) = n-1 y
+# f(n-1) = 0, y los dígitos libres f(1..n-2) numeran el árbol en
+# [0, n^(n-2)).
+
+def _digits_rank(digits, base):
+    r = 0
+    for d in digits:
+        r = r * base + d
+    return r
+
+
+def _digits_unrank(rank, base, length):
+    digits = [0] * length
+    for i in range(length - 1, -1, -1):
+        rank, digits[i] = divmod(rank, base)
+    if rank:
+        raise ValueError("Rango fuera de [0, base^longitud).")
+    return digits
+
+
+def rank_function(f):
+    """Índice de f en [0, n^n)"""
+    return _digits_rank(f, len(f))
+
+
+def unrank_function(n, rank):
+    """Función de índice rank en [0, n^n)"""
+    return _digits_unrank(rank, n, n)
+
+
+def rank_vertebrate(edges, start, end):
+    """Índice del árbol vertebrado (edges, start, end) en [0, n^n)"""
+    return rank_function(tree_to_function(edges, start, end))
+
+
+def unrank_vertebrate(n, rank):
+    """Árbol vertebrado (edges, start, end) de índice rank en [0, n^n)"""
+    return function_to_tree(unrank_function(n, rank))
+
+
+def rank_tree(edges):
+    """Índice del árbol en [0, n^(n-2))"""
+    n = len(edges) + 1
+    if n <= 2:
+        return 0
+    f = tree_to_function(edges, 0, n - 1)
+    return _digits_rank(f[1:n-1], n)
+
+
+def tree_code_function(n, rank):
+    """Función con vértebra 0 → n-1 del árbol de índice rank"""
+    if n == 1:
+        if rank != 0:
+            raise ValueError("Rango fuera de [0, base^longitud).")
+        return [0]
+    return [n - 1] + _digits_unrank(rank, n, n - 2) + [0]
+
+
+def unrank_tree(n, rank):
+    """Aristas del árbol de índice rank en [0, n^(n-2))"""
+    return function_to_tree(tree_code_function(n, rank))[0]
+
+# ==============================================================================
+# UTILIDADES
+# ==============================================================================
+
+def cycle_notation(f):
+    """Notación cíclica 1-indexada, p. ej. '(1 2 3) (5)'"""
+    return " ".join("(" + " ".join(str(x+1) for x in cyc) + ")" for cyc in find_cycles(f))
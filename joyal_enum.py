@@ -0,0 +1,130 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Enumeración de los n^(n-2) árboles etiquetados           ║
+# ║                                                                            ║
+# ║     Fijando la vértebra de 1 a n, la biyección de Joyal identifica         ║
+# ║     cada árbol con una función tal que f(1) = n y f(n) = 1; los            ║
+# ║     valores f(2), ..., f(n-1) son libres y forman un código de             ║
+# ║     longitud n-2 (como el de Prüfer). Recorrer los códigos en orden        ║
+# ║     lexicográfico recorre todos los árboles sin materializarlos; el        ║
+# ║     índice de cada árbol es el de joyal_engine.rank_tree.                  ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import json
+import os
+import sys
+
+from joyal_engine import function_to_parents, tree_code_function
+
+def count_trees(n):
+    """Fórmula de Cayley"""
+    return 1 if n <= 2 else n ** (n - 2)
+
+# ==============================================================================
+# ENUMERADOR CON PUNTOS DE CONTROL
+# ==============================================================================
+
+class TreeEnumerator:
+    """
+    Recorre todos los árboles etiquetados de n vértices en orden fijo.
+
+    Cada árbol se entrega como arreglo de padres (array('i')) enraizado en
+    el vértice n-1, con -1 en la raíz. La memoria extra es la de una sola
+    función. Si se da checkpoint_path, la posición se guarda cada
+    checkpoint_every árboles, antes de entregar el siguiente: al reanudar
+    se repiten los árboles entregados desde el último punto de control
+    (a lo sumo checkpoint_every).
+
+    Con index y stop se recorre sólo el rango [index, stop), para repartir
+    el espacio de árboles entre varios procesos.
+    """
+
+    def __init__(self, n, index=0, checkpoint_path=None, checkpoint_every=100000, stop=None):
+        if n < 1:
+            raise ValueError("El número debe ser al menos 1")
+        self.n = n
+        self.total = count_trees(n) if stop is None else stop
+        if not 0 <= index <= self.total <= count_trees(n):
+            raise ValueError(f"Índice fuera de rango: {index}")
+        self.index = index
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+
+    @classmethod
+    def resume(cls, path, **kwargs):
+        """Reanuda desde un punto de control guardado con save()"""
+        with open(path, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+        kwargs.setdefault("checkpoint_path", path)
+        kwargs.setdefault("stop", state["total"])
+        return cls(state["n"], state["index"], **kwargs)
+
+    def checkpoint(self):
+        return {"n": self.n, "index": self.index, "total": self.total}
+
+    def save(self, path=None):
+        """Escribe el punto de control de forma atómica"""
+        path = path or self.checkpoint_path
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.checkpoint(), fh)
+        os.replace(tmp, path)
+
+    def __iter__(self):
+        n = self.n
+        f = tree_code_function(n, self.index)
+        every = self.checkpoint_every if self.checkpoint_path else 0
+
+        while self.index < self.total:
+            if every and self.index % every == 0:
+                self.save()
+            yield function_to_parents(f)
+            self.index += 1
+
+            # Odómetro sobre f[1..n-2]: el último dígito es el menos significativo
+            i = n - 2
+            while i >= 1:
+                if f[i] < n - 1:
+                    f[i] += 1
+                    break
+                f[i] = 0
+                i -= 1
+
+        if self.checkpoint_path:
+            self.save()
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Enumera los árboles etiquetados de n vértices (uno por línea, "
+                    "como padres 1-indexados; 0 marca la raíz).")
+    parser.add_argument("n", type=int, help="número de vértices")
+    parser.add_argument("--checkpoint", help="archivo de punto de control (se reanuda si existe)")
+    parser.add_argument("--every", type=int, default=100000, help="árboles entre puntos de control")
+    parser.add_argument("--limit", type=int, default=None, help="detenerse tras este número de árboles")
+    args = parser.parse_args(argv)
+
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        enum = TreeEnumerator.resume(args.checkpoint, checkpoint_every=args.every)
+        if enum.n != args.n:
+            parser.error(f"El punto de control es para n = {enum.n}")
+    else:
+        enum = TreeEnumerator(args.n, checkpoint_path=args.checkpoint, checkpoint_every=args.every)
+
+    out = sys.stdout
+    for k, parent in enumerate(enum):
+        if args.limit is not None and k >= args.limit:
+            break
+        out.write(" ".join(str(p + 1) for p in parent) + "\n")
+    if args.checkpoint:
+        enum.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
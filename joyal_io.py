@@ -0,0 +1,321 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Formato binario de funciones y árboles                   ║
+# ║                                                                            ║
+# ║     Cabecera fija de 32 bytes seguida de filas de ancho fijo en            ║
+# ║     uint8/uint16/uint32 (el menor que admite n):                           ║
+# ║         - función: n valores f(0..n-1)                                     ║
+# ║         - árbol:   n padres (la raíz end apunta a sí misma) y start        ║
+# ║     Los lectores usan numpy.memmap: una fila es un corte, sin parsear.     ║
+# ║     Las conversiones por lotes función ↔ árbol trabajan por bloques de     ║
+# ║     filas con NumPy.                                                       ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from joyal_batch import functions_to_parents
+from joyal_engine import parse_function
+
+MAGIC = b"JOYL"
+VERSION = 1
+KIND_FUNCTION, KIND_TREE = 0, 1
+KIND_NAMES = {KIND_FUNCTION: "funciones", KIND_TREE: "árboles"}
+
+# magic, versión, tipo, bytes por valor, n, número de filas
+_HEADER = struct.Struct("<4sBBBxIQ")
+HEADER_SIZE = 32
+
+Header = namedtuple("Header", "kind dtype n count")
+
+BLOCK_ROWS = 4096
+
+# ==============================================================================
+# CABECERA
+# ==============================================================================
+
+def dtype_for(n):
+    """Menor entero sin signo que guarda los vértices 0..n-1"""
+    if n <= 1 << 8:
+        return np.dtype(np.uint8)
+    if n <= 1 << 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def row_width(kind, n):
+    return n + 1 if kind == KIND_TREE else n
+
+
+def _pack_header(header):
+    raw = _HEADER.pack(MAGIC, VERSION, header.kind, header.dtype.itemsize, header.n, header.count)
+    return raw.ljust(HEADER_SIZE, b"\0")
+
+
+def read_header(path):
+    with open(path, "rb") as fh:
+        raw = fh.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"{path}: archivo demasiado corto.")
+    magic, version, kind, itemsize, n, count = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: no es un archivo de Joyal.")
+    if version != VERSION:
+        raise ValueError(f"{path}: versión {version} no soportada.")
+    if kind not in KIND_NAMES or itemsize not in (1, 2, 4):
+        raise ValueError(f"{path}: cabecera inválida.")
+    return Header(kind, np.dtype(f"<u{itemsize}"), n, count)
+
+# ==============================================================================
+# ESCRITURA
+# ==============================================================================
+
+class RecordWriter:
+    """
+    Escribe filas por bloques; el número de filas de la cabecera se
+    completa al cerrar. Uso: with RecordWriter(path, kind, n) as w: ...
+    """
+    def __init__(self, path, kind, n, dtype=None):
+        dtype = dtype_for(n) if dtype is None else np.dtype(dtype)
+        self.header = Header(kind, dtype.newbyteorder("<"), n, 0)
+        self.width = row_width(kind, n)
+        self.count = 0
+        self.fh = open(path, "wb")
+        self.fh.write(_pack_header(self.header))
+
+    def write(self, rows):
+        """Añade un bloque (k, ancho) de filas; los valores deben estar en 0..n-1"""
+        rows = np.asarray(rows)
+        if rows.ndim != 2 or rows.shape[1] != self.width:
+            raise ValueError(f"Cada fila debe tener {self.width} valores.")
+        if rows.size and (rows.min() < 0 or rows.max() >= self.header.n):
+            raise ValueError(f"Valores deben estar entre 1 y {self.header.n}.")
+        self.fh.write(rows.astype(self.header.dtype, copy=False).tobytes())
+        self.count += len(rows)
+
+    def close(self):
+        if self.fh.closed:
+            return
+        self.fh.seek(0)
+        self.fh.write(_pack_header(self.header._replace(count=self.count)))
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _blocks(rows, size=BLOCK_ROWS):
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def write_functions(path, functions, n=None):
+    """
+    Guarda funciones (0-indexadas) de tamaño n; acepta un arreglo (k, n)
+    o cualquier iterable de secuencias. Devuelve el número de filas.
+    """
+    if isinstance(functions, np.ndarray):
+        n = functions.shape[1]
+        blocks = (functions[lo:lo + BLOCK_ROWS] for lo in range(0, len(functions), BLOCK_ROWS))
+    else:
+        if n is None:
+            functions = iter(functions)
+            first = next(functions, None)
+            if first is None:
+                raise ValueError("No hay funciones que guardar.")
+            n = len(first)
+            functions = _chain(first, functions)
+        blocks = _blocks(functions)
+    with RecordWriter(path, KIND_FUNCTION, n) as w:
+        for block in blocks:
+            w.write(block)
+    return w.count
+
+
+def tree_rows(parents, starts):
+    """
+    Filas de árbol (k, n + 1) a partir de padres (k, n) con -1 en la raíz,
+    como los da joyal_batch.functions_to_parents: en el archivo los valores
+    no tienen signo, así que la raíz end pasa a apuntar a sí misma.
+    """
+    parents = np.asarray(parents, dtype=np.int64)
+    k, n = parents.shape
+    rows = np.empty((k, n + 1), dtype=np.int64)
+    rows[:, :n] = parents
+    r, c = np.nonzero(parents < 0)
+    rows[r, c] = c
+    rows[:, n] = starts
+    return rows
+
+
+def write_tree_records(path, parents, starts):
+    """
+    Guarda árboles vertebrados dados como arreglo de padres (k, n), con -1
+    en la raíz end, y los k vértices start. Devuelve el número de filas.
+    """
+    parents = np.asarray(parents)
+    with RecordWriter(path, KIND_TREE, parents.shape[1]) as w:
+        for lo in range(0, len(parents), BLOCK_ROWS):
+            w.write(tree_rows(parents[lo:lo + BLOCK_ROWS], starts[lo:lo + BLOCK_ROWS]))
+    return w.count
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+# ==============================================================================
+# LECTURA
+# ==============================================================================
+
+def open_records(path):
+    """
+    (cabecera, filas) con filas un numpy.memmap de solo lectura de forma
+    (count, ancho): f = filas[i] en un archivo de funciones; en uno de
+    árboles, filas[i, :n] son los padres y filas[i, n] el start.
+    """
+    header = read_header(path)
+    width = row_width(header.kind, header.n)
+    if header.count == 0:
+        return header, np.empty((0, width), dtype=header.dtype)
+    rows = np.memmap(path, dtype=header.dtype, mode="r", offset=HEADER_SIZE,
+                     shape=(header.count, width))
+    return header, rows
+
+# ==============================================================================
+# CONVERSIÓN POR LOTES
+# ==============================================================================
+
+def parents_to_functions(P, starts):
+    """
+    Versión por lotes de joyal_engine.tree_to_function_parent sobre filas
+    leídas del archivo (la raíz apunta a sí misma). Las vértebras se suben
+    a la vez en todas las filas, un nivel por paso; una fila sin raíz
+    (archivo dañado o ajeno) da ValueError.
+    """
+    P = np.asarray(P, dtype=np.int64)
+    k, n = P.shape
+    at = np.arange(k)
+    v = np.asarray(starts, dtype=np.int64).copy()
+    if P.size and (P.min() < 0 or P.max() >= n or v.min() < 0 or v.max() >= n):
+        raise ValueError(f"Valores deben estar entre 1 y {n}.")
+    on_spine = np.zeros((k, n), dtype=bool)
+    steps = [v]
+    length = np.zeros(k, dtype=np.int64)
+    active = np.ones(k, dtype=bool)
+    while active.any():
+        # Una vértebra tiene a lo sumo n vértices
+        if len(steps) > n:
+            raise ValueError("Árbol inválido: la vértebra no llega a la raíz.")
+        on_spine[at, v] = True
+        length += active
+        up = P[at, v]
+        active &= up != v
+        v = np.where(active, up, v)
+        steps.append(v)
+    spine = np.stack(steps)                       # spine[j, fila]
+
+    # sorted(vértebra) ↔ reversed(vértebra)
+    rows, cols = np.nonzero(on_spine)
+    first_of_row = np.searchsorted(rows, rows)
+    rank = np.arange(len(rows)) - first_of_row
+    F = P.copy()
+    F[rows, cols] = spine[length[rows] - 1 - rank, rows]
+    return F
+
+
+def convert(src, dst, block_rows=BLOCK_ROWS):
+    """
+    Convierte un archivo de funciones en uno de árboles o al revés, por
+    bloques de filas del memmap. Devuelve (cabecera de entrada, filas).
+    """
+    header, rows = open_records(src)
+    n = header.n
+    kind = KIND_TREE if header.kind == KIND_FUNCTION else KIND_FUNCTION
+    with RecordWriter(dst, kind, n) as w:
+        for lo in range(0, header.count, block_rows):
+            block = rows[lo:lo + block_rows]
+            if header.kind == KIND_FUNCTION:
+                w.write(tree_rows(*functions_to_parents(block)))
+            else:
+                w.write(parents_to_functions(block[:, :n], block[:, n]))
+    return header, w.count
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def _read_text(path):
+    fh = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield parse_function(line)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Formato binario de funciones y árboles vertebrados.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pack", help="texto (una función por línea) → binario")
+    p.add_argument("input", help="archivo de texto; - para stdin")
+    p.add_argument("output")
+    p = sub.add_parser("convert", help="funciones → árboles o árboles → funciones")
+    p.add_argument("input")
+    p.add_argument("output")
+    p = sub.add_parser("unpack", help="binario de funciones → texto")
+    p.add_argument("input")
+    p = sub.add_parser("info", help="muestra la cabecera")
+    p.add_argument("input")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.command == "pack":
+        try:
+            count = write_functions(args.output, _read_text(args.input))
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"{count} funciones → {args.output}", file=sys.stderr)
+    elif args.command == "convert":
+        try:
+            header, count = convert(args.input, args.output)
+        except ValueError as e:
+            parser.error(str(e))
+        target = KIND_NAMES[KIND_TREE if header.kind == KIND_FUNCTION else KIND_FUNCTION]
+        print(f"{count} {target} → {args.output} en {time.perf_counter() - t0:.1f} s",
+              file=sys.stderr)
+    elif args.command == "unpack":
+        header, rows = open_records(args.input)
+        if header.kind != KIND_FUNCTION:
+            parser.error("unpack espera un archivo de funciones")
+        for lo in range(0, header.count, BLOCK_ROWS):
+            for f in (rows[lo:lo + BLOCK_ROWS].astype(np.int64) + 1).tolist():
+                sys.stdout.write(",".join(map(str, f)) + "\n")
+    else:
+        header = read_header(args.input)
+        print(f"{KIND_NAMES[header.kind]}: n = {header.n}, {header.count} filas de "
+              f"{header.dtype.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
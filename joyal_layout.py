@@ -0,0 +1,378 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Posicionamiento de vértices (NumPy)                      ║
+# ║                                                                            ║
+# ║     Calcula las posiciones de todos los vértices a la vez, como            ║
+# ║     arreglos (n, 2) de coordenadas de pantalla dentro de un rectángulo     ║
+# ║     (x, y, ancho, alto):                                                   ║
+# ║       · circle_layout   el círculo clásico de la demostración              ║
+# ║       · tree_layout     árbol por capas o radial colgado de la vértebra    ║
+# ║       · force_layout    dígrafo de la función, fuerzas con rejilla         ║
+# ║                         tipo Barnes–Hut                                    ║
+# ║                                                                            ║
+# ║     SpatialGrid indexa las posiciones para el clic y el hover.             ║
+# ║     Camera desplaza y acerca la vista, y dice qué queda visible.           ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import numpy as np
+
+# Margen interior del rectángulo, en píxeles
+PADDING = 24
+
+def _rect(rect):
+    x, y, w, h = (float(v) for v in rect)
+    return x, y, w, h
+
+
+def to_points(P):
+    """Arreglo (n, 2) → lista de tuplas enteras, como las usa pygame"""
+    return [tuple(p) for p in np.rint(P).astype(int).tolist()]
+
+# ==============================================================================
+# CÍRCULO
+# ==============================================================================
+
+def circle_layout(n, rect, radius=None):
+    """n vértices sobre un círculo centrado, el primero arriba"""
+    x, y, w, h = _rect(rect)
+    if radius is None:
+        radius = max(1.0, min(w, h) / 2 - PADDING)
+    ang = 2 * np.pi * np.arange(n) / max(1, n) - np.pi / 2
+    return np.column_stack((x + w / 2 + radius * np.cos(ang),
+                            y + h / 2 + radius * np.sin(ang)))
+
+# ==============================================================================
+# ÁRBOL COLGADO DE LA VÉRTEBRA
+# ==============================================================================
+
+def hang_from_spine(parent, spine):
+    """
+    Padres de cada vértice hacia la vértebra (-1 en los vértices de ésta).
+
+    parent es un arreglo de padres enraizado en un extremo de la vértebra,
+    como los de joyal_engine.function_to_parents: el camino de cualquier
+    vértice a la raíz entra en la vértebra por su primer ancestro en ella.
+    """
+    hang = np.array(parent, dtype=np.int64)
+    hang[np.asarray(spine, dtype=np.int64)] = -1
+    return hang
+
+
+def _depths(hang):
+    """Distancia de cada vértice a su raíz, por duplicación de punteros"""
+    n = len(hang)
+    up = np.where(hang >= 0, hang, np.arange(n))
+    depth = (hang >= 0).astype(np.int64)
+    for _ in range(max(1, (n - 1).bit_length())):
+        depth = depth + depth[up]
+        up = up[up]
+    return depth
+
+
+def tree_layout(parent, spine, rect, radial=True):
+    """
+    Posiciones de un árbol con la vértebra como raíz común.
+
+    Cada vértice recibe un intervalo proporcional al número de hojas de su
+    subárbol; los vértices de la vértebra van en orden, uno tras otro. Con
+    radial=True los intervalos son ángulos y la profundidad el radio (la
+    vértebra en el anillo interior); si no, columnas y filas. Todo se
+    resuelve capa a capa con operaciones sobre arreglos.
+    """
+    hang = hang_from_spine(parent, spine)
+    spine = np.asarray(spine, dtype=np.int64)
+    n = len(hang)
+    depth = _depths(hang)
+    max_depth = int(depth.max()) if n else 0
+
+    # Vértices de cada capa
+    by_depth = np.argsort(depth, kind="stable")
+    cuts = np.searchsorted(depth[by_depth], np.arange(max_depth + 2))
+    levels = [by_depth[cuts[d]:cuts[d + 1]] for d in range(max_depth + 1)]
+
+    # Ancho = hojas del subárbol, acumulado de la capa más profunda hacia arriba
+    width = np.zeros(n, dtype=np.int64)
+    for d in range(max_depth, 0, -1):
+        vs = levels[d]
+        width[vs] = np.maximum(width[vs], 1)
+        np.add.at(width, hang[vs], width[vs])
+    width[spine] = np.maximum(width[spine], 1)
+
+    # Inicio del intervalo: la vértebra en orden; los hijos, agrupados por
+    # padre, se reparten el intervalo del padre.
+    lo = np.zeros(n, dtype=np.int64)
+    lo[spine] = np.cumsum(width[spine]) - width[spine]
+    for d in range(1, max_depth + 1):
+        vs = levels[d]
+        vs = vs[np.lexsort((vs, hang[vs]))]
+        before = np.cumsum(width[vs]) - width[vs]
+        first = np.ones(len(vs), dtype=bool)
+        first[1:] = hang[vs][1:] != hang[vs][:-1]
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(vs)), 0))
+        lo[vs] = lo[hang[vs]] + before - before[group_start]
+
+    total = max(1, int(width[spine].sum()))
+    t = (lo + width / 2) / total
+    x, y, w, h = _rect(rect)
+
+    if radial:
+        r_max = max(1.0, min(w, h) / 2 - PADDING)
+        if max_depth == 0:
+            r = np.full(n, r_max if len(spine) > 1 else 0.0)
+        else:
+            # una vértebra de un solo vértice va al centro
+            r_min = 0.25 * r_max if len(spine) > 1 else 0.0
+            r = r_min + (r_max - r_min) * depth / max_depth
+        ang = 2 * np.pi * t - np.pi / 2
+        return np.column_stack((x + w / 2 + r * np.cos(ang), y + h / 2 + r * np.sin(ang)))
+
+    rows = depth / max(1, max_depth) if max_depth else np.full(n, 0.5)
+    return np.column_stack((x + PADDING + t * (w - 2 * PADDING),
+                            y + PADDING + rows * (h - 2 * PADDING)))
+
+# ==============================================================================
+# FUERZAS (FRUCHTERMAN–REINGOLD CON REJILLA)
+# ==============================================================================
+
+_NEIGHBOURS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)]
+
+def _repulsion(P, k2, G):
+    """
+    Repulsión k²/d aproximada con una rejilla G×G, al estilo Barnes–Hut.
+
+    Cada celda se resume en su masa y centro de masa. Las celdas vecinas
+    (3×3) actúan sobre cada vértice desde su centro de masa (sin contar al
+    propio vértice); las lejanas, celda a celda, sobre todos los vértices de
+    la celda. El coste por iteración es O(n + G^4) en lugar de O(n²).
+    """
+    lo = P.min(axis=0)
+    span = float((P.max(axis=0) - lo).max()) + 1e-9
+    ij = np.minimum((G * (P - lo) / span).astype(np.int64), G - 1)
+    cell = ij[:, 0] * G + ij[:, 1]
+    C = G * G
+    mass = np.bincount(cell, minlength=C).astype(float)
+    com = np.column_stack((np.bincount(cell, P[:, 0], minlength=C),
+                           np.bincount(cell, P[:, 1], minlength=C)))
+    com /= np.maximum(mass, 1)[:, None]
+
+    # Campo lejano entre celdas ocupadas no vecinas
+    occ = np.flatnonzero(mass)
+    oi, oj = occ // G, occ % G
+    d = com[occ][:, None, :] - com[occ][None, :, :]
+    r2 = (d ** 2).sum(axis=2)
+    near = (np.abs(oi[:, None] - oi[None, :]) <= 1) & (np.abs(oj[:, None] - oj[None, :]) <= 1)
+    wgt = np.where(near, 0.0, mass[occ][None, :] / np.maximum(r2, 1e-9))
+    far = np.zeros((C, 2))
+    far[occ] = (d * wgt[:, :, None]).sum(axis=1)
+    force = far[cell]
+
+    # Campo cercano: las 9 celdas alrededor de cada vértice
+    for di, dj in _NEIGHBOURS:
+        ni, nj = ij[:, 0] + di, ij[:, 1] + dj
+        ok = (ni >= 0) & (ni < G) & (nj >= 0) & (nj < G)
+        nb = np.where(ok, ni * G + nj, 0)
+        m = np.where(ok, mass[nb], 0.0)
+        c = com[nb]
+        if di == 0 and dj == 0:
+            # excluirse a sí mismo del centro de masa de su celda
+            m = m - 1
+            c = (com[nb] * (m + 1)[:, None] - P) / np.maximum(m, 1)[:, None]
+        d = P - c
+        r2 = np.maximum((d ** 2).sum(axis=1), 1e-2)
+        force += d * (np.where(m > 0, m, 0.0) / r2)[:, None]
+
+    return k2 * force
+
+
+def force_layout(F, rect, iterations=80, seed=0, init=None):
+    """
+    Posiciones del dígrafo v → F[v] por fuerzas (Fruchterman–Reingold).
+
+    Las aristas atraen con d²/k y todos los vértices se repelen con k²/d,
+    ésta aproximada con _repulsion. La simulación corre en el cuadrado
+    unidad con temperatura decreciente y al final se escala, sin deformar,
+    al rectángulo. init (n, 2) permite partir de otra disposición; por
+    defecto el círculo, con una pequeña perturbación determinada por seed.
+    """
+    F = np.asarray(F, dtype=np.int64)
+    n = len(F)
+    if n == 0:
+        return np.zeros((0, 2))
+
+    rng = np.random.default_rng(seed)
+    P = circle_layout(n, (0, 0, 1, 1), 0.5) if init is None else np.array(init, dtype=float)
+    P = P + rng.normal(scale=1e-3, size=P.shape)
+
+    k = 1 / np.sqrt(n)
+    G = int(np.clip(np.sqrt(n), 4, 24))
+    src = np.flatnonzero(F != np.arange(n))
+    dst = F[src]
+    t0 = 0.1 * float((P.max(axis=0) - P.min(axis=0)).max() or 1)
+
+    for it in range(iterations):
+        disp = _repulsion(P, k * k, G)
+        d = P[src] - P[dst]
+        dist = np.sqrt((d ** 2).sum(axis=1)) + 1e-9
+        pull = d * (dist / k)[:, None]
+        np.subtract.at(disp, src, pull)
+        np.add.at(disp, dst, pull)
+
+        t = t0 * (1 - it / iterations) + 1e-4
+        length = np.sqrt((disp ** 2).sum(axis=1)) + 1e-9
+        P += disp * (np.minimum(length, t) / length)[:, None]
+
+    return fit_to_rect(P, rect)
+
+
+def fit_to_rect(P, rect):
+    """Escala y centra P dentro del rectángulo conservando la proporción"""
+    x, y, w, h = _rect(rect)
+    lo, hi = P.min(axis=0), P.max(axis=0)
+    span = np.maximum(hi - lo, 1e-9)
+    scale = min((w - 2 * PADDING) / span[0], (h - 2 * PADDING) / span[1])
+    center = np.array([x + w / 2, y + h / 2])
+    if not np.isfinite(scale) or (hi - lo).max() < 1e-9:
+        return np.broadcast_to(center, P.shape).copy()
+    return center + (P - (lo + hi) / 2) * scale
+
+# ==============================================================================
+# ÍNDICE ESPACIAL
+# ==============================================================================
+
+class SpatialGrid:
+    """
+    Rejilla uniforme sobre posiciones de vértices para consultas de punto.
+
+    Las celdas miden cell_size (al menos el diámetro de búsqueda), de modo
+    que un punto sólo puede tocar vértices de su celda y de las 8 vecinas:
+    cada consulta cuesta O(1) esperado. Se reconstruye cuando cambia la
+    disposición.
+    """
+
+    def __init__(self, points, cell_size):
+        self.cell_size = max(1, int(cell_size))
+        self.points = [tuple(p) for p in points]
+        self.cells = {}
+        size = self.cell_size
+        for i, (x, y) in enumerate(self.points):
+            self.cells.setdefault((int(x // size), int(y // size)), []).append(i)
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, x, y, radius):
+        """Índice del vértice más cercano a (x, y) a distancia ≤ radius, o None"""
+        size = self.cell_size
+        cx, cy = int(x // size), int(y // size)
+        reach = int(radius // size) + 1
+        best, best_d2 = None, radius * radius
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    px, py = self.points[i]
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 <= best_d2:
+                        best, best_d2 = i, d2
+        return best
+
+# ==============================================================================
+# GEOMETRÍA DE ARISTAS
+# ==============================================================================
+
+def trimmed_segments(P, src, dst, trim):
+    """
+    Segmentos P[src] → P[dst] recortados trim píxeles en cada extremo, para
+    no entrar en los círculos de los vértices. Descarta los de longitud 0.
+    Devuelve (A, B, u): extremos (m, 2) y direcciones unitarias.
+    """
+    P = np.asarray(P, dtype=float)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    A, B = P[src], P[dst]
+    d = B - A
+    L = np.sqrt((d ** 2).sum(axis=1))
+    keep = L > 1e-6
+    A, B, d, L = A[keep], B[keep], d[keep], L[keep]
+    u = d / L[:, None]
+    return A + u * trim, B - u * trim, u
+
+
+def arrow_geometry(P, src, dst, trim, head=10, spread=np.pi / 6):
+    """
+    Flechas src → dst en una sola pasada: segmentos recortados y la punta
+    como triángulo (m, 3, 2) con lados de longitud head abiertos ±spread.
+    """
+    A, B, u = trimmed_segments(P, src, dst, trim)
+    ang = np.arctan2(u[:, 1], u[:, 0])
+    left = B - head * np.column_stack((np.cos(ang - spread), np.sin(ang - spread)))
+    right = B - head * np.column_stack((np.cos(ang + spread), np.sin(ang + spread)))
+    return A, B, np.stack((B, left, right), axis=1)
+
+# ==============================================================================
+# CÁMARA (DESPLAZAMIENTO Y ZOOM)
+# ==============================================================================
+
+class Camera:
+    """
+    Transformación afín pantalla = mundo * zoom + (tx, ty) sobre un área.
+
+    Las coordenadas de mundo son las de las disposiciones anteriores (las
+    de pantalla con zoom 1). version cambia con cada movimiento, para usarla
+    como clave de cachés.
+    """
+    MIN_ZOOM = 0.25
+    MAX_ZOOM = 40.0
+
+    def __init__(self, rect):
+        self.rect = tuple(float(v) for v in rect)
+        self.version = 0
+        self.drag_from = None
+        self.reset()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.tx = self.ty = 0.0
+        self.version += 1
+
+    def to_screen(self, P):
+        """Arreglo (m, 2) de mundo → pantalla"""
+        return np.asarray(P, dtype=float) * self.zoom + (self.tx, self.ty)
+
+    def to_world(self, x, y):
+        return (x - self.tx) / self.zoom, (y - self.ty) / self.zoom
+
+    def pan(self, dx, dy):
+        self.tx += dx
+        self.ty += dy
+        self.version += 1
+
+    def zoom_at(self, x, y, factor):
+        """Acerca o aleja manteniendo fijo el punto de pantalla (x, y)"""
+        zoom = min(self.MAX_ZOOM, max(self.MIN_ZOOM, self.zoom * factor))
+        factor = zoom / self.zoom
+        self.tx = x - (x - self.tx) * factor
+        self.ty = y - (y - self.ty) * factor
+        self.zoom = zoom
+        self.version += 1
+
+    def world_view(self, margin=0.0):
+        """Rectángulo visible en mundo (x0, y0, x1, y1), ampliado margin píxeles"""
+        x, y, w, h = self.rect
+        x0, y0 = self.to_world(x - margin, y - margin)
+        x1, y1 = self.to_world(x + w + margin, y + h + margin)
+        return x0, y0, x1, y1
+
+    def visible(self, P, margin=0.0):
+        """Máscara de los puntos (mundo) que caen en el área"""
+        x0, y0, x1, y1 = self.world_view(margin)
+        P = np.asarray(P, dtype=float).reshape(-1, 2)
+        return (P[:, 0] >= x0) & (P[:, 0] <= x1) & (P[:, 1] >= y0) & (P[:, 1] <= y1)
+
+    def visible_segments(self, P, src, dst, margin=0.0):
+        """Máscara de las aristas cuya caja envolvente toca el área"""
+        x0, y0, x1, y1 = self.world_view(margin)
+        P = np.asarray(P, dtype=float).reshape(-1, 2)
+        A, B = P[np.asarray(src, dtype=np.int64)], P[np.asarray(dst, dtype=np.int64)]
+        lo, hi = np.minimum(A, B), np.maximum(A, B)
+        return (hi[:, 0] >= x0) & (lo[:, 0] <= x1) & (hi[:, 1] >= y0) & (lo[:, 1] <= y1)
@@ -0,0 +1,191 @@
+# ╔════════════════════════════════════════════════════════════════════════════╗
+# ║                                                                            ║
+# ║     PROYECTO MD - Exportación de imágenes sin ventana                      ║
+# ║                                                                            ║
+# ║     Dibuja las escenas de la demostración (modo 1: árbol → función,        ║
+# ║     modo 2: función → árbol) sobre superficies fuera de pantalla con el    ║
+# ║     controlador de vídeo "dummy" de SDL y las guarda como PNG. Muchas      ║
+# ║     funciones se reparten en un pool de procesos.                          ║
+# ║                                                                            ║
+# ╚════════════════════════════════════════════════════════════════════════════╝
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# Debe fijarse antes de iniciar pygame (lo hace app.init_display)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import Demostracion_Joyal as app
+from joyal_engine import function_to_tree, parse_function, validate_function
+
+# errors: lista de (índice, mensaje) de las funciones que no se pudieron dibujar
+RenderReport = namedtuple("RenderReport", "functions frames errors seconds")
+
+MODES = ("1", "2", "ambos")
+
+# ==============================================================================
+# ESCENAS
+# ==============================================================================
+
+def _surface():
+    return app.pygame.Surface((app.WIDTH, app.HEIGHT))
+
+
+def _save(surface, out_dir, name):
+    path = os.path.join(out_dir, name)
+    app.pygame.image.save(surface, path)
+    return path
+
+
+def render_function_to_tree(f, out_dir, prefix):
+    """
+    Modo 2: el dígrafo de f y el árbol obtenido.
+    Devuelve las rutas de los PNG escritos.
+    """
+    app.inicializar_estructuras(len(f))
+    scene = app.FunctionToTreeMode()
+    scene.func_input.text = ",".join(str(v + 1) for v in f)
+    if not scene.process_function():
+        raise ValueError(scene.error_message)
+
+    surface = _surface()
+    scene.draw(surface)
+    paths = [_save(surface, out_dir, f"{prefix}_modo2_funcion.png")]
+    scene.construct_tree_from_function()
+    scene.draw(surface)
+    paths.append(_save(surface, out_dir, f"{prefix}_modo2_arbol.png"))
+    return paths
+
+
+def render_tree_to_function(f, out_dir, prefix):
+    """
+    Modo 1 paso a paso para el árbol vertebrado que codifica f: árbol
+    construido, inicio de la vértebra elegido y función obtenida.
+    """
+    app.inicializar_estructuras(len(f))
+    scene = app.TreeToFunctionMode()
+    edges, start, end = function_to_tree(f)
+    for u, v in edges:
+        scene.handle_vertex_click(u)
+        scene.handle_vertex_click(v)
+
+    surface = _surface()
+    paths = []
+    for name, vertex in (("arbol", start), ("inicio", end), ("funcion", None)):
+        scene.draw(surface)
+        paths.append(_save(surface, out_dir, f"{prefix}_modo1_{name}.png"))
+        if vertex is not None:
+            scene.handle_vertex_click(vertex)
+
+    # La interfaz pide un final distinto del inicio; si la vértebra es un
+    # solo vértice se completa el paso directamente.
+    if scene.step == 2:
+        scene.end_vertex = end
+        scene.calculate_function()
+        scene.step = 3
+        scene.draw(surface)
+        paths[-1] = _save(surface, out_dir, f"{prefix}_modo1_funcion.png")
+    return paths
+
+
+def render_one(index, f, out_dir, mode="ambos"):
+    """
+    Renderiza una función (secuencia 0-indexada o línea de texto como
+    "2,3,1,5,5,4") en los modos pedidos; devuelve las rutas
+    """
+    if isinstance(f, str):
+        f = list(parse_function(f))
+    validate_function(f)
+    if len(f) < 2:
+        raise ValueError("El número debe ser al menos 2")
+    app.init_display(visible=False)
+    prefix = f"{index:05d}"
+    paths = []
+    if mode in ("1", "ambos"):
+        paths += render_tree_to_function(f, out_dir, prefix)
+    if mode in ("2", "ambos"):
+        paths += render_function_to_tree(f, out_dir, prefix)
+    return paths
+
+# ==============================================================================
+# EN PARALELO
+# ==============================================================================
+
+def _render_task(args):
+    """(rutas, mensaje de error o None): una función inválida no detiene el lote"""
+    try:
+        return render_one(*args), None
+    except ValueError as e:
+        return [], str(e)
+
+
+def render_many(functions, out_dir, mode="ambos", workers=None):
+    """
+    Renderiza cada función de la lista (secuencias o líneas de texto) en
+    un pool de procesos (cada uno con su propio pygame sin ventana). Con
+    workers=1 se hace en este mismo proceso. Las funciones inválidas o que
+    fallan se cuentan en errors.
+    """
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(i, f if isinstance(f, str) else list(f), out_dir, mode)
+             for i, f in enumerate(functions)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        results = [_render_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+
+    frames = sum(len(paths) for paths, _ in results)
+    errors = [(i, error) for i, (_, error) in enumerate(results) if error is not None]
+    return RenderReport(len(tasks), frames, errors, time.perf_counter() - t0)
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def read_functions(fh):
+    """
+    Líneas con una función cada una (valores 1-indexados separados por
+    comas). Se interpretan en render_one, así que una línea inválida sólo
+    cuenta como error de su índice.
+    """
+    functions = []
+    for line in fh:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            functions.append(line)
+    return functions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Exporta a PNG las escenas de la biyección de Joyal para una lista de funciones.")
+    parser.add_argument("input", help="archivo con una función por línea (p. ej. 2,3,1,5,5,4); - para stdin")
+    parser.add_argument("-o", "--output", default="frames", help="carpeta de salida")
+    parser.add_argument("--mode", choices=MODES, default="ambos", help="modo 1, modo 2 o ambos")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, todos los núcleos)")
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        functions = read_functions(sys.stdin)
+    else:
+        with open(args.input, "r", encoding="utf-8") as fh:
+            functions = read_functions(fh)
+
+    report = render_many(functions, args.output, args.mode, args.workers)
+    for i, error in report.errors:
+        print(f"{i:05d}: {error}", file=sys.stderr)
+    print(f"{report.functions} funciones, {len(report.errors)} con error, {report.frames} "
+          f"imágenes en {report.seconds:.1f} s → {args.output}", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())